@@ -34,3 +34,5 @@ IEB_ORDERS_URL = f"https://core.iebmas.grupoieb.com.ar/api/orders/customer-accou
 IEB_DIVIDENDS_URL = f"https://core.iebmas.grupoieb.com.ar/api/portfolio/customer-account/{IEB_ACCOUNT_ID}/dividends"
 
 TRANSACTIONS_FILE = "transactions.json"
+# Modification time (ns) of TRANSACTIONS_FILE as of the last reconciliation.
+RECONCILED_MARKER_FILE = os.path.join(DATA_DIR, "transactions_reconciled.txt")
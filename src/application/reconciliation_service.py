@@ -1,3 +1,5 @@
+import csv
+from collections import defaultdict
 import json
 import pandas as pd
 import logging
@@ -5,14 +7,21 @@ import os
 import config
 import numpy as np
 from src.shared.financial_utils import (
+    lookup_nearest,
     map_instrument_to_asset_type,
-    parse_option_details,
+    parse_option_details_series,
+    split_fifo_sale,
+    to_sorted_series,
 )
+from src.shared.types import ReconciledTransaction
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Parsed rate files keyed by path, reused while mtime and size are unchanged.
+_RATE_CACHE: dict[str, tuple[tuple[int, int], np.ndarray, np.ndarray]] = {}
+
 
 class ExchangeRateLoader:
     """Loads and provides exchange rates from CSV files."""
@@ -21,28 +30,49 @@ class ExchangeRateLoader:
         self.dolar_mep = self._load_rate_file(config.DOLAR_MEP_FILE)
         self.dolar_ccl = self._load_rate_file(config.DOLAR_CCL_FILE)
 
-    def _load_rate_file(self, file_path: str):
+    def _load_rate_file(self, file_path: str) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the rate series as date-sorted (dates, values) arrays."""
         try:
-            return pd.read_csv(file_path, parse_dates=["date"])
+            stat = os.stat(file_path)
         except FileNotFoundError:
-            return pd.DataFrame(columns=["date", "value"])
+            return np.array([], dtype="datetime64[ns]"), np.array([], dtype=float)
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _RATE_CACHE.get(file_path)
+        if cached and cached[0] == stamp:
+            return cached[1], cached[2]
+
+        rate_df = pd.read_csv(
+            file_path,
+            usecols=["date", "value"],
+            dtype={"value": "float64"},
+            parse_dates=["date"],
+            date_format="ISO8601",
+        )
+        # Sorts only when the file is not already in date order.
+        dates, values = to_sorted_series(rate_df)
+        _RATE_CACHE[file_path] = (stamp, dates, values)
+        return dates, values
+
+    def get_rates(self, dates, asset_types) -> np.ndarray:
+        """Gets the exchange rate for each date/asset type pair, NaN if unavailable."""
+        dates = pd.DatetimeIndex(pd.to_datetime(dates)).to_numpy(dtype="datetime64[ns]")
+        valid = ~np.isnat(dates)
+        is_cedear = np.asarray(asset_types) == "CEDEAR"
+        rates = np.full(len(dates), np.nan)
+        for mask, (rate_dates, rate_values) in (
+            (is_cedear, self.dolar_ccl),
+            (~is_cedear, self.dolar_mep),
+        ):
+            mask = mask & valid
+            if len(rate_dates) and mask.any():
+                rates[mask] = lookup_nearest(rate_dates, rate_values, dates[mask])
+        return rates
 
     def get_rate(self, date, asset_type: str):
         """Gets the appropriate exchange rate for a given date and asset type."""
-        rate_df = self.dolar_ccl if asset_type == "CEDEAR" else self.dolar_mep
-        if rate_df.empty:
-            return None
-        merged = pd.merge_asof(
-            pd.DataFrame({"date": [pd.to_datetime(date)]}),
-            rate_df.sort_values("date"),
-            on="date",
-            direction="nearest",
-        )
-        return (
-            merged["value"].iloc[0]
-            if not merged.empty and pd.notna(merged["value"].iloc[0])
-            else None
-        )
+        rate = self.get_rates([date], [asset_type])[0]
+        return None if np.isnan(rate) else rate
 
 
 def _load_processed_ids() -> set:
@@ -57,19 +87,55 @@ def _load_processed_ids() -> set:
     }
     for file_path, id_cols in files_to_check.items():
         try:
-            if os.path.exists(file_path):
-                df = pd.read_csv(file_path)
-                for col in id_cols:
-                    if col in df.columns:
-                        processed_ids.update(df[col].dropna().astype(str))
-        except (FileNotFoundError, pd.errors.EmptyDataError):
+            # Scan the raw rows and keep only the ID fields instead of parsing
+            # every column into a DataFrame.
+            with open(file_path, "r", newline="", encoding="utf-8") as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                indices = [header.index(col) for col in id_cols if col in header]
+                if not indices:
+                    continue
+                for row in reader:
+                    processed_ids.update(
+                        row[i] for i in indices if i < len(row) and row[i]
+                    )
+        except FileNotFoundError:
             logging.info(f"{file_path} not found or is empty.")
         except Exception as e:
             logging.error(f"Error reading {file_path} for IDs: {e}")
     return processed_ids
 
 
-def _load_and_filter_new_transactions(processed_ids: set) -> list:
+def _column(df: pd.DataFrame, name: str, default=None) -> pd.Series:
+    """Returns a column of a normalized frame, or a default-filled one if absent."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _parse_naive_dates(values: pd.Series) -> pd.Series:
+    """Parses date strings to naive UTC timestamps, trying the ISO-8601 path first."""
+    dates = pd.to_datetime(values, format="ISO8601", utc=True, errors="coerce")
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = [
+            pd.to_datetime(value, utc=True, errors="coerce") for value in values[retry]
+        ]
+    return dates.dt.tz_localize(None)
+
+
+def _safe_asset_type(tx: dict) -> str:
+    """Maps a transaction's instrument, tagging malformed records as UNKNOWN."""
+    try:
+        return map_instrument_to_asset_type(tx.get("instrument", {}))
+    except Exception as e:
+        logging.warning(f"Could not process transaction {tx.get('id')}: {e}")
+        return "UNKNOWN"
+
+
+def _load_and_filter_new_transactions(
+    processed_ids: set,
+) -> list[ReconciledTransaction]:
     """Loads transactions from JSON, filtering for new and valid entries."""
     try:
         with open(config.TRANSACTIONS_FILE, "r", encoding="utf-8") as f:
@@ -77,177 +143,263 @@ def _load_and_filter_new_transactions(processed_ids: set) -> list:
     except Exception as e:
         logging.error(f"Could not read or parse {config.TRANSACTIONS_FILE}: {e}")
         return []
+    # Already processed history is dropped before any DataFrame is built for it.
+    candidates = [
+        tx
+        for tx in all_transactions or []
+        if str(tx.get("id")) not in processed_ids
+        and tx.get("state") == "FULFILLED"
+        and tx.get("orderOperation") in ("BUY", "SELL")
+    ]
+    del all_transactions
+    if not candidates:
+        return []
 
-    new_transactions = []
-    for tx in all_transactions:
-        tx_id = str(tx.get("id"))
-        if (
-            tx_id in processed_ids
-            or tx.get("state") != "FULFILLED"
-            or tx.get("orderOperation") not in ["BUY", "SELL"]
-        ):
-            continue
-        try:
-            instrument = tx.get("instrument", {})
-            asset_type = map_instrument_to_asset_type(instrument)
-            if asset_type == "UNKNOWN":
-                continue
-
-            total_gross = float(tx.get("totalGross", 0))
-            total_net = float(tx.get("total", 0))
-            commissions_data = tx.get("commissions", {})
+    txs = pd.json_normalize(candidates)
+    txs["id"] = [str(tx.get("id")) for tx in candidates]
+    txs["asset_type"] = [_safe_asset_type(tx) for tx in candidates]
+    txs = txs[txs["asset_type"] != "UNKNOWN"].drop_duplicates(subset="id")
+    if txs.empty:
+        return []
 
-            market_tariff_pct = (
-                commissions_data.get("marketTariffPercentage", 0.0) / 100.0
-            )
-            broker_tariff_pct = commissions_data.get("tariffPercentage", 0.0) / 100.0
+    total_gross = pd.to_numeric(_column(txs, "totalGross", 0), errors="coerce")
+    total_net = pd.to_numeric(_column(txs, "total", 0), errors="coerce")
+    market_tariff_pct = (
+        pd.to_numeric(
+            _column(txs, "commissions.marketTariffPercentage", 0.0), errors="coerce"
+        )
+        .fillna(0.0)
+        .div(100.0)
+    )
+    broker_tariff_pct = (
+        pd.to_numeric(
+            _column(txs, "commissions.tariffPercentage", 0.0), errors="coerce"
+        )
+        .fillna(0.0)
+        .div(100.0)
+    )
+    market_fees = total_gross * market_tariff_pct
+    broker_fees = total_gross * broker_tariff_pct
+
+    total_commission = market_fees + broker_fees
+    commission_iva = _column(txs, "commissions.commissionIva", False).eq(True)
+    taxes = (total_commission * config.VAT_RATE).where(commission_iva, 0)
+
+    calculated_fees = total_commission + taxes
+    json_fees = (total_net - total_gross).abs()
+    discrepancies = ~np.isclose(calculated_fees, json_fees, atol=0.01)
+    for tx_id, calculated, from_json in zip(
+        txs["id"][discrepancies],
+        calculated_fees[discrepancies],
+        json_fees[discrepancies],
+    ):
+        logging.warning(
+            f"Fee calculation discrepancy for tx {tx_id}. Calculated: {calculated}, From JSON: {from_json}"
+        )
 
-            market_fees = total_gross * market_tariff_pct
-            broker_fees = total_gross * broker_tariff_pct
+    symbol = _column(txs, "symbol")
+    ticker = symbol.where(
+        symbol.notna() & symbol.ne(""), _column(txs, "instrument.name")
+    )
+    is_usd = _column(txs, "currency").eq("USD")
+    ticker = ticker.where(~is_usd, ticker.fillna("").str.replace("D", "", regex=False))
 
-            total_commission = market_fees + broker_fees
-            taxes = 0
-            if commissions_data.get("commissionIva", False):
-                taxes = total_commission * config.VAT_RATE
+    share_value = pd.to_numeric(_column(txs, "shareValue"), errors="coerce")
+    price = share_value.where(
+        _column(txs, "instrument.priceUnitScale").ne(100), share_value / 100.0
+    )
 
-            calculated_fees = total_commission + taxes
-            json_fees = abs(total_net - total_gross)
-            if not np.isclose(calculated_fees, json_fees, atol=0.01):
+    clean_df = pd.DataFrame(
+        {
+            "broker_id": txs["id"],
+            "date": _parse_naive_dates(_column(txs, "operationDate")),
+            "op_type": txs["orderOperation"],
+            "ticker": ticker,
+            "asset_type": txs["asset_type"],
+            "quantity": pd.to_numeric(
+                _column(txs, "executedAmount"), errors="coerce"
+            ),
+            "price": price,
+            "currency": _column(txs, "currency"),
+            "total_net": total_net,
+            "market_fees": market_fees,
+            "broker_fees": broker_fees,
+            "taxes": taxes,
+        }
+    )
+    required = ["date", "quantity", "price", "currency", "total_net", "market_fees"]
+    invalid = clean_df[required].isna().any(axis=1)
+    for tx_id in clean_df.loc[invalid, "broker_id"]:
+        logging.warning(f"Could not process transaction {tx_id}: missing fields")
+    clean_df = clean_df[~invalid].sort_values("date", kind="stable")
+
+    new_transactions: list[ReconciledTransaction] = clean_df.to_dict("records")
+    # map_instrument_to_asset_type labels option legs "OPTION".
+    is_option = (clean_df["asset_type"] == "OPTION").to_numpy()
+    if is_option.any():
+        option_txs = txs.loc[clean_df.index[is_option]]
+        expiration_dates = _parse_naive_dates(
+            _column(option_txs, "instrument.maturityDate")
+        )
+        option_details = parse_option_details_series(
+            _column(option_txs, "instrument.galloName", "")
+        )
+        option_records = [tx for tx, opt in zip(new_transactions, is_option) if opt]
+        for clean_tx, details, expiration_date in zip(
+            option_records,
+            option_details.to_dict("records"),
+            expiration_dates,
+        ):
+            if pd.notna(details["underlying_asset"]):
+                clean_tx.update(details)
+            clean_tx["expiration_date"] = expiration_date
+            if pd.isna(details["strike_price"]) or pd.isna(expiration_date):
                 logging.warning(
-                    f"Fee calculation discrepancy for tx {tx_id}. Calculated: {calculated_fees}, From JSON: {json_fees}"
+                    f"Option transaction {clean_tx['broker_id']} is missing its "
+                    "strike or expiration date."
                 )
 
-            ticker = (
-                (tx.get("symbol") or instrument.get("name", "")).replace("D", "")
-                if tx.get("currency") == "USD"
-                else (tx.get("symbol") or instrument.get("name"))
-            )
-            price = (
-                float(tx["shareValue"]) / 100.0
-                if instrument.get("priceUnitScale") == 100
-                else float(tx["shareValue"])
-            )
+    processed_ids.update(clean_df["broker_id"])
+    return new_transactions
 
-            clean_tx = {
-                "broker_id": tx_id,
-                "date": pd.to_datetime(tx["operationDate"]).tz_localize(None),
-                "op_type": tx["orderOperation"],
-                "ticker": ticker,
-                "asset_type": asset_type,
-                "quantity": float(tx["executedAmount"]),
-                "price": price,
-                "currency": tx["currency"],
-                "total_net": total_net,
-                "market_fees": market_fees,
-                "broker_fees": broker_fees,
-                "taxes": taxes,
-            }
-            if asset_type == "OPCION":
-                details = parse_option_details(instrument.get("galloName", ""))
-                details["expiration_date"] = pd.to_datetime(
-                    instrument.get("maturityDate"), errors="coerce"
-                )
-                clean_tx.update(details)
-            new_transactions.append(clean_tx)
-            processed_ids.add(tx_id)
-        except Exception as e:
-            logging.warning(f"Could not process transaction {tx_id}: {e}")
 
-    new_transactions.sort(key=lambda x: x["date"])
-    return new_transactions
+def _buy_costs(transactions, tx_rates: np.ndarray) -> tuple[list, list]:
+    """
+    Returns the ARS and USD cost of every transaction, computed column-wise.
+    Costs that need a missing exchange rate are None.
+    """
+    total_net = np.array([tx["total_net"] for tx in transactions], dtype=float)
+    in_ars = np.array([tx["currency"] == "ARS" for tx in transactions], dtype=bool)
+    has_rate = ~np.isnan(tx_rates) & (tx_rates != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        costs_ars = np.where(in_ars, total_net, total_net * tx_rates)
+        costs_usd = costs_ars / tx_rates
+    return (
+        np.where(in_ars | has_rate, costs_ars, None).tolist(),
+        np.where(has_rate, costs_usd, None).tolist(),
+    )
 
 
-def _apply_sell_transaction(tx, open_positions, rates):
-    """Applies a sell transaction against open lots."""
-    newly_closed_trades = []
-    remaining_to_sell = tx["quantity"]
-    rate = rates.get_rate(tx["date"], tx["asset_type"])
+def _apply_sell_transaction(tx: ReconciledTransaction, ticker_lots, rate):
+    """
+    Applies a sell transaction against the open lots of its ticker.
+    Returns the resulting closed trades as a dict of column arrays.
+    """
     if not rate:
         logging.warning(f"No exchange rate for {tx['ticker']} on {tx['date'].date()}")
 
     revenue_ars = tx["total_net"] if tx["currency"] == "ARS" else tx["total_net"] * rate
     revenue_usd = revenue_ars / rate if rate else None
 
-    matching_lots = sorted(
-        [p for p in open_positions if p["ticker"] == tx["ticker"]],
-        key=lambda p: p["date"],
+    matching_lots = sorted(ticker_lots, key=lambda p: p["date"])
+    sale = split_fifo_sale(
+        np.array([lot["quantity"] for lot in matching_lots], dtype=float),
+        np.array([lot.get("total_cost_ars") or 0 for lot in matching_lots], float),
+        np.array([lot.get("total_cost_usd") or 0 for lot in matching_lots], float),
+        tx["quantity"],
+        revenue_ars or 0,
+        revenue_usd or 0,
     )
+    taken, proportions = sale.taken, sale.proportions
+
+    consumed = np.flatnonzero(taken > 0)
+    consumed_lots = [matching_lots[i] for i in consumed]
+    closed_trades = {
+        "ticker": np.array([lot["ticker"] for lot in consumed_lots], dtype=object),
+        "quantity": taken[consumed],
+        "buy_date": np.array([lot["date"] for lot in consumed_lots], dtype=object),
+        "sell_date": np.full(len(consumed), tx["date"], dtype=object),
+        "total_cost_ars": sale.costs_ars[consumed],
+        "total_cost_usd": sale.costs_usd[consumed],
+        "total_revenue_ars": sale.revenues_ars[consumed],
+        "total_revenue_usd": sale.revenues_usd[consumed],
+        "buy_broker_transaction_id": np.array(
+            [lot.get("broker_id") for lot in consumed_lots], dtype=object
+        ),
+        "sell_broker_transaction_id": np.full(
+            len(consumed), tx["broker_id"], dtype=object
+        ),
+    }
 
-    for lot in matching_lots:
-        if remaining_to_sell <= 0:
-            break
-        qty_from_lot = min(lot["quantity"], remaining_to_sell)
-        proportion = qty_from_lot / lot["quantity"] if lot["quantity"] > 0 else 0
-
-        closed_trade = {
-            "ticker": lot["ticker"],
-            "quantity": qty_from_lot,
-            "buy_date": lot["date"],
-            "sell_date": tx["date"],
-            "total_cost_ars": (lot.get("total_cost_ars") or 0) * proportion,
-            "total_cost_usd": (lot.get("total_cost_usd") or 0) * proportion,
-            "total_revenue_ars": (revenue_ars or 0) * (qty_from_lot / tx["quantity"])
-            if tx["quantity"] > 0
-            else 0,
-            "total_revenue_usd": (revenue_usd or 0) * (qty_from_lot / tx["quantity"])
-            if tx["quantity"] > 0
-            else 0,
-            "buy_broker_transaction_id": lot.get("broker_id"),
-            "sell_broker_transaction_id": tx["broker_id"],
-        }
-        newly_closed_trades.append(closed_trade)
-
+    for lot, qty_from_lot, proportion in zip(
+        consumed_lots, taken[consumed], proportions[consumed]
+    ):
         lot["quantity"] -= qty_from_lot
         if lot.get("total_cost_ars"):
             lot["total_cost_ars"] *= 1 - proportion
         if lot.get("total_cost_usd"):
             lot["total_cost_usd"] *= 1 - proportion
-        remaining_to_sell -= qty_from_lot
 
-    return newly_closed_trades
+    return closed_trades
 
 
-def _save_portfolio_state(open_positions, newly_closed_trades):
-    """Saves the updated open positions and appends closed trades to CSV files."""
-    open_df = pd.DataFrame(open_positions)
-    open_df.rename(
-        columns={
-            "date": "purchase_date",
-            "broker_id": "broker_transaction_id",
-            "currency": "original_currency",
-        },
-        inplace=True,
-    )
+_OPEN_POSITION_COLUMNS = {
+    "purchase_date": "date",
+    "ticker": "ticker",
+    "quantity": "quantity",
+    "total_cost_ars": "total_cost_ars",
+    "total_cost_usd": "total_cost_usd",
+    "asset_type": "asset_type",
+    "original_currency": "currency",
+    "lotes": "lotes",
+    "expiration_date": "expiration_date",
+    "market_fees": "market_fees",
+    "broker_fees": "broker_fees",
+    "taxes": "taxes",
+    "broker_transaction_id": "broker_id",
+}
 
-    final_cols = [
-        "purchase_date",
-        "ticker",
-        "quantity",
-        "total_cost_ars",
-        "total_cost_usd",
-        "asset_type",
-        "original_currency",
-        "lotes",
-        "market_fees",
-        "broker_fees",
-        "taxes",
-        "broker_transaction_id",
-    ]
 
-    for col in final_cols:
-        if col not in open_df.columns:
-            open_df[col] = pd.NA
+def _load_open_positions() -> list[dict]:
+    """Loads the saved lots, keyed the same way as freshly reconciled ones."""
+    try:
+        lots = pd.read_csv(config.OPEN_POSITIONS_FILE)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return []
+    # Files written before expiration_date was persisted lack that column.
+    for column in ("purchase_date", "expiration_date"):
+        if column in lots.columns:
+            lots[column] = pd.to_datetime(lots[column], errors="coerce")
+    return lots.rename(columns=_OPEN_POSITION_COLUMNS).to_dict("records")
+
 
-    open_df = open_df.reindex(columns=final_cols)
+def _csv_value(value):
+    """Formats a lot value the way pandas writes it to CSV."""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if value is None or value is pd.NaT:
+        return ""
+    if isinstance(value, float) and np.isnan(value):
+        return ""
+    return value
 
-    open_df.to_csv(config.OPEN_POSITIONS_FILE, index=False, date_format="%Y-%m-%d")
 
-    if newly_closed_trades:
-        new_closed_df = pd.DataFrame(newly_closed_trades)
-        file_exists = (
-            os.path.exists(config.CLOSED_TRADES_FILE)
-            and os.path.getsize(config.CLOSED_TRADES_FILE) > 0
+def _save_portfolio_state(open_positions, closed_trade_chunks):
+    """Saves the updated open positions and appends closed trades to CSV files."""
+    with open(config.OPEN_POSITIONS_FILE, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(_OPEN_POSITION_COLUMNS)
+        for lot in open_positions:
+            writer.writerow(
+                _csv_value(lot.get(key, lot.get(column)))
+                for column, key in _OPEN_POSITION_COLUMNS.items()
+            )
+
+    closed_trade_chunks = [c for c in closed_trade_chunks if c["quantity"].size]
+    if closed_trade_chunks:
+        # A single sell needs no concatenation; its arrays are used as they are.
+        new_closed_df = pd.DataFrame(
+            closed_trade_chunks[0]
+            if len(closed_trade_chunks) == 1
+            else {
+                col: np.concatenate([chunk[col] for chunk in closed_trade_chunks])
+                for col in closed_trade_chunks[0]
+            }
         )
+        try:
+            file_exists = os.stat(config.CLOSED_TRADES_FILE).st_size > 0
+        except FileNotFoundError:
+            file_exists = False
         new_closed_df.to_csv(
             config.CLOSED_TRADES_FILE,
             mode="a",
@@ -257,43 +409,82 @@ def _save_portfolio_state(open_positions, newly_closed_trades):
         )
 
 
+def _transactions_mtime() -> int | None:
+    try:
+        return os.stat(config.TRANSACTIONS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _transactions_changed_since_last_reconciliation(mtime: int | None) -> bool:
+    """
+    Returns False when the transactions file is the one last reconciled.
+    The mtime is kept in its own marker, since other writers also touch the
+    portfolio CSVs.
+    """
+    if mtime is None or not os.path.exists(config.OPEN_POSITIONS_FILE):
+        return True
+    try:
+        with open(config.RECONCILED_MARKER_FILE, encoding="utf-8") as f:
+            return f.read().strip() != str(mtime)
+    except FileNotFoundError:
+        return True
+
+
+def _mark_reconciled(mtime: int | None):
+    if mtime is None:
+        return
+    with open(config.RECONCILED_MARKER_FILE, "w", encoding="utf-8") as f:
+        f.write(str(mtime))
+
+
 def reconcile_portfolio():
     """Main reconciliation script orchestrating the load, process, and save steps."""
+    transactions_mtime = _transactions_mtime()
+    if not _transactions_changed_since_last_reconciliation(transactions_mtime):
+        logging.info(
+            f"{config.TRANSACTIONS_FILE} has no changes since the last reconciliation. Skipping."
+        )
+        return
+
     rates = ExchangeRateLoader()
     processed_ids = _load_processed_ids()
     new_transactions = _load_and_filter_new_transactions(processed_ids)
 
-    try:
-        open_positions = pd.read_csv(
-            config.OPEN_POSITIONS_FILE, parse_dates=["purchase_date", "expiration_date"]
-        ).to_dict("records")
-    except (FileNotFoundError, pd.errors.EmptyDataError):
-        open_positions = []
+    open_positions = _load_open_positions()
+    lots_by_ticker = defaultdict(list)
+    for position in open_positions:
+        lots_by_ticker[position["ticker"]].append(position)
 
-    newly_closed_trades = []
-    for tx in new_transactions:
-        if tx["op_type"] == "BUY":
-            rate = rates.get_rate(tx["date"], tx["asset_type"])
-
-            cost_ars = (
-                tx["total_net"]
-                if tx["currency"] == "ARS"
-                else tx["total_net"] * rate
-                if rate
-                else None
-            )
-            cost_usd = cost_ars / rate if rate else None
+    tx_rates = rates.get_rates(
+        [tx["date"] for tx in new_transactions],
+        [tx["asset_type"] for tx in new_transactions],
+    )
+
+    costs_ars, costs_usd = _buy_costs(new_transactions, tx_rates)
 
-            lot = tx.copy()
-            lot.update({"total_cost_ars": cost_ars, "total_cost_usd": cost_usd})
+    closed_trade_chunks = []
+    for tx, rate, cost_ars, cost_usd in zip(
+        new_transactions, tx_rates, costs_ars, costs_usd
+    ):
+        rate = None if np.isnan(rate) else rate
+        if tx["op_type"] == "BUY":
+            lot = {**tx, "total_cost_ars": cost_ars, "total_cost_usd": cost_usd}
             open_positions.append(lot)
+            lots_by_ticker[tx["ticker"]].append(lot)
 
         elif tx["op_type"] == "SELL":
-            closed_from_tx = _apply_sell_transaction(tx, open_positions, rates)
-            newly_closed_trades.extend(closed_from_tx)
-            open_positions = [p for p in open_positions if p["quantity"] > 0.001]
+            ticker_lots = lots_by_ticker[tx["ticker"]]
+            closed_trade_chunks.append(
+                _apply_sell_transaction(tx, ticker_lots, rate)
+            )
+            lots_by_ticker[tx["ticker"]] = [
+                p for p in ticker_lots if p["quantity"] > 0.001
+            ]
 
-    _save_portfolio_state(open_positions, newly_closed_trades)
+    open_positions = [p for p in open_positions if p["quantity"] > 0.001]
+    _save_portfolio_state(open_positions, closed_trade_chunks)
+    _mark_reconciled(transactions_mtime)
 
 
 if __name__ == "__main__":
@@ -27,12 +27,9 @@ class ReportOrchestrator:
     def __init__(self):
         self.repository = PortfolioRepository()
 
-    def _ensure_data_is_updated(self, positions_df):
+    def _ensure_data_is_updated(self):
         """Llama al data_fetcher para actualizar las fuentes de datos necesarias."""
-        data_fetcher.update_cer()
-        data_fetcher.update_cpi_usa()
-        data_fetcher.update_dolar_mep()
-        data_fetcher.update_dolar_ccl()
+        data_fetcher.update_all_data()
 
     def generate_and_display_report(self):
         """
@@ -41,8 +38,8 @@ class ReportOrchestrator:
         pd.set_option("display.max_columns", None)
         pd.set_option("display.width", 1000)
 
-        initial_portfolio = self.repository.load_full_portfolio()
-        self._ensure_data_is_updated(initial_portfolio.open_positions)
+        # Las actualizaciones no dependen del portafolio, así que se carga una sola vez.
+        self._ensure_data_is_updated()
         portfolio = self.repository.load_full_portfolio()
         reporting_service = ReportingService(portfolio)
 
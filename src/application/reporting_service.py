@@ -1,10 +1,41 @@
 import pandas as pd
+import numpy as np
 import logging
 import config
 import re
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from src.domain.portfolio import Portfolio
 from src.infrastructure.gateways.instances import data912_connector
-from src.shared.financial_utils import calculate_inflation_period
+from src.shared.financial_utils import calculate_inflation_periods
+
+FIXED_INCOME_TYPES = frozenset({"BOND", "LETTER", "PUBLIC_TITLE", "RF", "ON"})
+
+# Asset types quoted by the same stocks endpoint, so they share one price fetch.
+_ARG_STOCK_TYPES = frozenset({"ACCION", "GENERAL", "MERVAL", "LIDER", "PRIVATE_TITLE"})
+
+# Shared read-only result for asset groups that have no live price source.
+_EMPTY_PRICES = MappingProxyType({})
+
+# Characters stripped from tickers and API symbols before matching them.
+_SANITIZE_RE = re.compile(r"[\s.,()]")
+
+
+def _nominal_return_pct(revenue: pd.Series, cost: pd.Series) -> pd.Series:
+    """Percentage return of revenue over cost, NaN where the cost is zero."""
+    cost = cost.where(cost != 0)
+    return ((revenue - cost) / cost) * 100
+
+
+def _real_return_pct(nominal_pct: pd.Series, inflation: np.ndarray) -> pd.Series:
+    """Deflates nominal percentage returns by inflation, reusing a single buffer."""
+    real = nominal_pct.to_numpy(dtype=float, copy=True)
+    real /= 100
+    real += 1
+    real /= 1 + inflation
+    real -= 1
+    real *= 100
+    return pd.Series(real, index=nominal_pct.index)
 
 
 class ReportingService:
@@ -13,13 +44,32 @@ class ReportingService:
         self.api_connector = data912_connector
         self.price_cache = {}
 
+    @staticmethod
+    def _price_cache_key(asset_type: str) -> str:
+        if asset_type in FIXED_INCOME_TYPES:
+            return "fixed_income"
+        if asset_type in _ARG_STOCK_TYPES:
+            return "arg_stocks"
+        return asset_type
+
+    def _prefetch_live_prices(self, asset_types):
+        """Concurrently fetches live prices for every asset group not yet cached."""
+        groups = {}
+        for asset_type in asset_types:
+            if pd.notna(asset_type):
+                groups.setdefault(self._price_cache_key(asset_type), asset_type)
+        pending = [t for key, t in groups.items() if key not in self.price_cache]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            list(executor.map(self._get_live_prices_by_type, pending))
+
     def _get_live_prices_by_type(self, asset_type: str):
         """
         Fetches live prices from the API based on a unified mapping of asset types.
         Caches results to avoid redundant calls.
+        Asset types are expected upper-cased, as PortfolioRepository loads them.
         """
-        asset_type = asset_type.upper()
-
         # Mapping from our specific asset types to API endpoint functions
         FETCHER_MAP = {
             "CEDEAR": self.api_connector.get_arg_cedears,
@@ -31,11 +81,13 @@ class ReportingService:
             "PRIVATE_TITLE": self.api_connector.get_arg_stocks,
         }
 
-        FIXED_INCOME_TYPES = ["BOND", "LETTER", "PUBLIC_TITLE", "RF", "ON"]
-        cache_key = "fixed_income" if asset_type in FIXED_INCOME_TYPES else asset_type
+        cache_key = self._price_cache_key(asset_type)
 
         if cache_key in self.price_cache:
             return self.price_cache[cache_key]
+        if cache_key != "fixed_income" and asset_type not in FETCHER_MAP:
+            self.price_cache[cache_key] = _EMPTY_PRICES
+            return _EMPTY_PRICES
 
         logging.info(f"Buscando precios en vivo para el grupo: {cache_key}...")
 
@@ -46,8 +98,10 @@ class ReportingService:
                 self.api_connector.get_arg_notes,
                 self.api_connector.get_arg_corporate_debt,
             ]
-            for fetch in fetch_functions:
-                live_data = fetch()
+            # The three endpoints are independent, so wait on the slowest, not the sum.
+            with ThreadPoolExecutor(max_workers=len(fetch_functions)) as executor:
+                results = list(executor.map(lambda fetch: fetch(), fetch_functions))
+            for live_data in results:
                 if isinstance(live_data, list):
                     prices = {
                         item["symbol"].upper(): item.get("c", 0)
@@ -56,67 +110,74 @@ class ReportingService:
                     }
                     all_prices.update(prices)
         else:
-            fetch_function = FETCHER_MAP.get(asset_type)
-            if fetch_function:
-                live_data = fetch_function()
-                if isinstance(live_data, list):
-                    all_prices = {
-                        re.sub(r"[\s.,()]", "", item["symbol"]).upper(): item.get(
-                            "c", 0
-                        )
-                        for item in live_data
-                        if "symbol" in item
-                    }
+            live_data = FETCHER_MAP[asset_type]()
+            if isinstance(live_data, list):
+                all_prices = {
+                    _SANITIZE_RE.sub("", item["symbol"]).upper(): item.get("c", 0)
+                    for item in live_data
+                    if "symbol" in item
+                }
 
         self.price_cache[cache_key] = all_prices
         return all_prices
 
-    def _get_current_price(self, asset_type: str, ticker: str) -> float | None:
-        if pd.isna(asset_type) or pd.isna(ticker):
-            return None
+    def _get_current_prices(
+        self, asset_types: pd.Series, tickers: pd.Series
+    ) -> pd.Series:
+        """Looks up the live price of every (asset_type, ticker) pair in one pass."""
+        self._prefetch_live_prices(asset_types.unique())
+        asset_types = asset_types.astype(object)
+        is_fixed_income = asset_types.isin(FIXED_INCOME_TYPES)
+        cache_keys = asset_types.where(
+            ~asset_types.isin(_ARG_STOCK_TYPES), "arg_stocks"
+        ).where(~is_fixed_income, "fixed_income")
+        sanitized_tickers = tickers.str.replace(
+            _SANITIZE_RE, "", regex=True
+        ).str.upper()
 
-        price_dict = self._get_live_prices_by_type(asset_type)
-        sanitized_ticker = re.sub(r"[\s.,()]", "", ticker).upper()
-        price = price_dict.get(sanitized_ticker)
+        # One map per price group instead of flattening every live quote.
+        prices = pd.Series(np.nan, index=tickers.index)
+        for cache_key in cache_keys.dropna().unique():
+            in_group = cache_keys == cache_key
+            group_prices = self.price_cache.get(cache_key, _EMPTY_PRICES)
+            prices[in_group] = pd.to_numeric(
+                sanitized_tickers[in_group].map(group_prices), errors="coerce"
+            )
 
-        if price is None:
+        missing = prices.isna() & asset_types.notna() & tickers.notna()
+        for ticker, sanitized_ticker in zip(
+            tickers[missing], sanitized_tickers[missing]
+        ):
             logging.warning(
                 f"No se encontró precio en vivo para el ticker: {ticker} (Buscado como: {sanitized_ticker})"
             )
-            return None
 
         # For fixed income, the price from the API is per 100 V/N
-        if asset_type.upper() in ["BOND", "LETTER", "PUBLIC_TITLE", "RF", "ON"]:
-            return float(price) / config.BOND_PRICE_DIVISOR
-
-        return float(price)
+        return prices.where(~is_fixed_income, prices / config.BOND_PRICE_DIVISOR)
 
     def generate_open_positions_report(self) -> dict:
         if self.portfolio.open_positions.empty:
             return {"consolidated": pd.DataFrame(), "options": pd.DataFrame()}
 
         self.price_cache = {}  # Reset cache for each report run
-        positions = self.portfolio.open_positions.copy()
-
-        options_positions = positions[positions["asset_type"] == "OPTION"]
-        positions = positions[positions["asset_type"] != "OPTION"].copy()
+        # Both slices are only read from, so no defensive copies are needed.
+        positions = self.portfolio.open_positions
+        is_option = positions["asset_type"] == "OPTION"
+        options_positions = positions[is_option]
+        positions = positions[~is_option]
 
         if positions.empty:
             return {"consolidated": pd.DataFrame(), "options": options_positions}
 
+        self._prefetch_live_prices(positions["asset_type"].unique())
         consolidated = (
-            positions.groupby("ticker")
-            .apply(
-                lambda x: pd.Series(
-                    {
-                        "quantity": x["quantity"].sum(),
-                        "total_cost_ars": x["total_cost_ars"].sum(),
-                        "total_cost_usd": x["total_cost_usd"].sum(),
-                        "asset_type": x["asset_type"].iloc[0],
-                        "first_purchase_date": x["purchase_date"].min(),
-                    }
-                ),
-                include_groups=False,
+            positions.groupby("ticker", observed=True)
+            .agg(
+                quantity=("quantity", "sum"),
+                total_cost_ars=("total_cost_ars", "sum"),
+                total_cost_usd=("total_cost_usd", "sum"),
+                asset_type=("asset_type", "first"),
+                first_purchase_date=("purchase_date", "min"),
             )
             .reset_index()
         )
@@ -124,126 +185,85 @@ class ReportingService:
         consolidated["buy_price_ars"] = (
             consolidated["total_cost_ars"] / consolidated["quantity"]
         )
-        consolidated["current_price"] = consolidated.apply(
-            lambda row: self._get_current_price(row["asset_type"], row["ticker"]),
-            axis=1,
+        consolidated["current_price"] = self._get_current_prices(
+            consolidated["asset_type"], consolidated["ticker"]
         )
 
         # Drop rows where a price could not be found to avoid errors in calculation
-        consolidated.dropna(subset=["current_price"], inplace=True)
+        consolidated = consolidated.dropna(subset=["current_price"])
 
         consolidated["nominal_return_ars_pct"] = (
             consolidated["current_price"] / consolidated["buy_price_ars"] - 1
         ) * 100
         today = pd.Timestamp.now().normalize()
-        consolidated["age_days"] = (
-            today - pd.to_datetime(consolidated["first_purchase_date"])
-        ).dt.days
-        consolidated["real_return_ars_pct"] = consolidated.apply(
-            lambda row: (
-                (1 + row["nominal_return_ars_pct"] / 100)
-                / (
-                    1
-                    + calculate_inflation_period(
-                        row["first_purchase_date"], today, self.portfolio.cer_data
-                    )
-                )
-                - 1
-            )
-            * 100,
-            axis=1,
+        # purchase_date is parsed to datetime64 when the portfolio is loaded.
+        first_purchase = consolidated["first_purchase_date"]
+        consolidated["age_days"] = (today - first_purchase).dt.days
+        inflation_ars = calculate_inflation_periods(
+            first_purchase, today, self.portfolio.cer_series
+        )
+        consolidated["real_return_ars_pct"] = _real_return_pct(
+            consolidated["nominal_return_ars_pct"], inflation_ars
         )
         return {"consolidated": consolidated, "options": options_positions}
 
     def generate_closed_trades_report(self) -> pd.DataFrame:
         if self.portfolio.closed_trades.empty:
             return pd.DataFrame()
-        report_df = self.portfolio.closed_trades.copy()
-        report_df["total_cost_ars"] = report_df["total_cost_ars"].replace(0, pd.NA)
-        report_df["total_cost_usd"] = report_df["total_cost_usd"].replace(0, pd.NA)
-        report_df["nominal_return_ars_pct"] = (
-            (report_df["total_revenue_ars"] - report_df["total_cost_ars"])
-            / report_df["total_cost_ars"]
-        ) * 100
-        report_df["nominal_return_usd_pct"] = (
-            (report_df["total_revenue_usd"] - report_df["total_cost_usd"])
-            / report_df["total_cost_usd"]
-        ) * 100
-        report_df["real_return_ars_pct"] = report_df.apply(
-            lambda row: (
-                (1 + row["nominal_return_ars_pct"] / 100)
-                / (
-                    1
-                    + calculate_inflation_period(
-                        row["buy_date"],
-                        row["sell_date"],
-                        self.portfolio.cer_data,
-                    )
-                )
-                - 1
-            )
-            * 100
-            if pd.notna(row["buy_date"])
-            else None,
-            axis=1,
+        # Only new columns are added, so a shallow copy keeps the portfolio intact.
+        report_df = self.portfolio.closed_trades.copy(deep=False)
+        report_df["nominal_return_ars_pct"] = _nominal_return_pct(
+            report_df["total_revenue_ars"], report_df["total_cost_ars"]
         )
-        report_df["real_return_usd_pct"] = report_df.apply(
-            lambda row: (
-                (1 + row["nominal_return_usd_pct"] / 100)
-                / (
-                    1
-                    + calculate_inflation_period(
-                        row["buy_date"],
-                        row["sell_date"],
-                        self.portfolio.cpi_usa,
-                    )
-                )
-                - 1
-            )
-            * 100
-            if pd.notna(row["buy_date"])
-            else None,
-            axis=1,
+        report_df["nominal_return_usd_pct"] = _nominal_return_pct(
+            report_df["total_revenue_usd"], report_df["total_cost_usd"]
         )
+        has_buy_date = report_df["buy_date"].notna()
+        inflation_ars = calculate_inflation_periods(
+            report_df["buy_date"], report_df["sell_date"], self.portfolio.cer_series
+        )
+        inflation_usd = calculate_inflation_periods(
+            report_df["buy_date"], report_df["sell_date"], self.portfolio.cpi_usa_series
+        )
+        report_df["real_return_ars_pct"] = _real_return_pct(
+            report_df["nominal_return_ars_pct"], inflation_ars
+        ).where(has_buy_date)
+        report_df["real_return_usd_pct"] = _real_return_pct(
+            report_df["nominal_return_usd_pct"], inflation_usd
+        ).where(has_buy_date)
 
-        def weighted_avg(group, avg_col, weight_col):
-            d = group[avg_col]
-            w = group[weight_col]
-            try:
-                return (d * w).sum() / w.sum()
-            except ZeroDivisionError:
-                return 0
-
+        # Weighted averages are sum(return * cost) / sum(cost) per ticker.
         consolidated_df = (
-            report_df.groupby("ticker")
-            .apply(
-                lambda g: pd.Series(
-                    {
-                        "quantity": g["quantity"].sum(),
-                        "buy_date": g["buy_date"].min(),
-                        "sell_date": g["sell_date"].max(),
-                        "total_cost_ars": g["total_cost_ars"].sum(),
-                        "total_revenue_ars": g["total_revenue_ars"].sum(),
-                        "total_cost_usd": g["total_cost_usd"].sum(),
-                        "total_revenue_usd": g["total_revenue_usd"].sum(),
-                        "real_return_ars_pct": weighted_avg(
-                            g, "real_return_ars_pct", "total_cost_ars"
-                        ),
-                        "real_return_usd_pct": weighted_avg(
-                            g, "real_return_usd_pct", "total_cost_usd"
-                        ),
-                    }
-                ),
-                include_groups=False,
+            report_df.assign(
+                weighted_ars=report_df["real_return_ars_pct"]
+                * report_df["total_cost_ars"],
+                weighted_usd=report_df["real_return_usd_pct"]
+                * report_df["total_cost_usd"],
+            )
+            .groupby("ticker", observed=True)
+            .agg(
+                quantity=("quantity", "sum"),
+                buy_date=("buy_date", "min"),
+                sell_date=("sell_date", "max"),
+                total_cost_ars=("total_cost_ars", "sum"),
+                total_revenue_ars=("total_revenue_ars", "sum"),
+                total_cost_usd=("total_cost_usd", "sum"),
+                total_revenue_usd=("total_revenue_usd", "sum"),
+                weighted_ars=("weighted_ars", "sum"),
+                weighted_usd=("weighted_usd", "sum"),
             )
             .reset_index()
         )
-        consolidated_df["nominal_return_ars_pct"] = (
-            (consolidated_df["total_revenue_ars"] - consolidated_df["total_cost_ars"])
-            / consolidated_df["total_cost_ars"]
-        ) * 100
-        consolidated_df["nominal_return_usd_pct"] = (
-            (consolidated_df["total_revenue_usd"] - consolidated_df["total_cost_usd"])
-            / consolidated_df["total_cost_usd"]
-        ) * 100
+        consolidated_df["real_return_ars_pct"] = (
+            consolidated_df.pop("weighted_ars") / consolidated_df["total_cost_ars"]
+        )
+        consolidated_df["real_return_usd_pct"] = (
+            consolidated_df.pop("weighted_usd") / consolidated_df["total_cost_usd"]
+        )
+        consolidated_df["nominal_return_ars_pct"] = _nominal_return_pct(
+            consolidated_df["total_revenue_ars"], consolidated_df["total_cost_ars"]
+        )
+        consolidated_df["nominal_return_usd_pct"] = _nominal_return_pct(
+            consolidated_df["total_revenue_usd"], consolidated_df["total_cost_usd"]
+        )
         return consolidated_df
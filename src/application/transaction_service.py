@@ -1,32 +1,77 @@
+import numpy as np
 import pandas as pd
 import config
-from functools import lru_cache
 from src.domain.portfolio import Portfolio
 from src.infrastructure.persistence.portfolio_repository import PortfolioRepository
+from src.shared.financial_utils import (
+    SortedSeries,
+    lookup_nearest,
+    split_fifo_sale,
+)
 from src.shared.types import TransactionData
 
 
+# Units per traded contract for every instrument category that can be recorded.
+_CONTRACT_SIZES = {
+    **dict.fromkeys(
+        ["ACCION", "CEDEAR", "MERVAL", "GENERAL", "LIDER", "PRIVATE_TITLE"], 1
+    ),
+    **dict.fromkeys(["RF", "BOND", "LETTER", "PUBLIC_TITLE"], 1),
+    "OPTION": config.OPTION_LOT_SIZE,
+}
+
+
+def _gross_amount(category: str, quantity, price, action: str):
+    """Quantity times price, scaled by the contract size of the category."""
+    contract_size = _CONTRACT_SIZES.get(category)
+    if contract_size is None:
+        raise ValueError(f"Asset type '{category}' not recognized for {action} logic.")
+    return quantity * price * contract_size
+
+
+def _append_rows(
+    frame: pd.DataFrame, rows: list[dict] | dict | pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Returns frame with rows appended, built and concatenated in a single step.
+    rows may be a list of records, a dict of equal-length columns or a frame.
+    """
+    new_rows = pd.DataFrame(rows)
+    if new_rows.empty:
+        return frame
+    if frame.empty:
+        return new_rows
+    combined = pd.concat([frame, new_rows], ignore_index=True)
+    # concat falls back to object for categoricals with new values; restore them.
+    for col in frame.select_dtypes("category").columns:
+        combined[col] = combined[col].astype("category")
+    return combined
+
+
 class TransactionService:
     def __init__(self, portfolio: Portfolio, repository: PortfolioRepository):
         self.portfolio = portfolio
         self.repository = repository
+        # Exchange rates by (date in ns, asset type); lives and dies with the service.
+        self._rate_cache: dict[tuple[int, str], float | None] = {}
+
+    def _rates_for(self, asset_type: str) -> SortedSeries:
+        if asset_type == "CEDEAR":
+            return self.portfolio.dolar_ccl_series
+        return self.portfolio.dolar_mep_series
 
-    @lru_cache(maxsize=None)
     def _get_exchange_rate(self, date: pd.Timestamp, asset_type: str) -> float | None:
-        rate_df = (
-            self.portfolio.dolar_ccl
-            if asset_type == "CEDEAR"
-            else self.portfolio.dolar_mep
-        )
-        if rate_df.empty:
-            return None
-        merged = pd.merge_asof(
-            pd.DataFrame({"date": [date]}),
-            rate_df.sort_values(by="date"),
-            on="date",
-            direction="nearest",
-        )
-        return merged["value"].iloc[0] if not merged.empty else None
+        target = np.datetime64(pd.Timestamp(date), "ns")
+        cache_key = (target.view(np.int64).item(), asset_type)
+        if cache_key not in self._rate_cache:
+            rate_dates, rate_values = self._rates_for(asset_type)
+            # A single binary search on the pre-sorted arrays; no pandas round-trip.
+            self._rate_cache[cache_key] = (
+                lookup_nearest(rate_dates, rate_values, np.array([target]))[0]
+                if len(rate_dates)
+                else None
+            )
+        return self._rate_cache[cache_key]
 
     def record_buy(self, details: TransactionData):
         asset_type = details["asset_type"].upper()
@@ -34,24 +79,7 @@ class TransactionService:
         quantity = details["quantity"]
         instrument_category = details.get("instrument_type", asset_type).upper()
 
-        base_cost = 0
-        if instrument_category in [
-            "ACCION",
-            "CEDEAR",
-            "MERVAL",
-            "GENERAL",
-            "LIDER",
-            "PRIVATE_TITLE",
-        ]:
-            base_cost = quantity * original_price
-        elif instrument_category in ["RF", "BOND", "LETTER", "PUBLIC_TITLE"]:
-            base_cost = quantity * original_price
-        elif instrument_category == "OPTION":
-            base_cost = quantity * original_price * config.OPTION_LOT_SIZE
-        else:
-            raise ValueError(
-                f"Asset type '{instrument_category}' not recognized for buy logic."
-            )
+        base_cost = _gross_amount(instrument_category, quantity, original_price, "buy")
 
         total_fees = (
             details["market_fees"] + details.get("broker_fees", 0) + details["taxes"]
@@ -79,25 +107,20 @@ class TransactionService:
             "taxes": details["taxes"],
             "broker_transaction_id": details.get("broker_transaction_id"),
         }
-        new_df = pd.DataFrame([new_position])
-        if self.portfolio.open_positions.empty:
-            self.portfolio.open_positions = new_df
-        else:
-            self.portfolio.open_positions = pd.concat(
-                [self.portfolio.open_positions, new_df], ignore_index=True
-            )
+        self.portfolio.open_positions = _append_rows(
+            self.portfolio.open_positions, [new_position]
+        )
         self.repository.save_open_positions(self.portfolio.open_positions)
 
     def record_sell(self, details: dict):
         open_lots = self.portfolio.open_positions
-        filtered_lots: pd.DataFrame = open_lots[
-            open_lots["ticker"] == details["ticker"]
-        ]
-        matching_lots: pd.DataFrame = filtered_lots.sort_values(
-            by="purchase_date"
-        ).copy()
-
-        if matching_lots["quantity"].sum() < details["quantity"]:
+        ticker_positions = np.flatnonzero(open_lots["ticker"] == details["ticker"])
+        ticker_lots: pd.DataFrame = open_lots.iloc[ticker_positions]
+        # FIFO order as positions into ticker_lots; the lots themselves stay unsorted.
+        fifo_order = np.argsort(ticker_lots["purchase_date"].to_numpy(), kind="stable")
+        lot_quantities = ticker_lots["quantity"].to_numpy(dtype=float)[fifo_order]
+
+        if np.nansum(lot_quantities) < details["quantity"]:
             raise ValueError(f"Not enough quantity of {details['ticker']} to sell.")
 
         rate = self._get_exchange_rate(details["date"], details["asset_type"])
@@ -109,24 +132,9 @@ class TransactionService:
         asset_type = details["asset_type"].upper()
         instrument_category = details.get("instrument_type", asset_type).upper()
 
-        gross_revenue = 0
-        if instrument_category in [
-            "ACCION",
-            "CEDEAR",
-            "MERVAL",
-            "GENERAL",
-            "LIDER",
-            "PRIVATE_TITLE",
-        ]:
-            gross_revenue = quantity * original_price
-        elif instrument_category in ["RF", "BOND", "LETTER", "PUBLIC_TITLE"]:
-            gross_revenue = quantity * original_price
-        elif instrument_category == "OPTION":
-            gross_revenue = quantity * original_price * config.OPTION_LOT_SIZE
-        else:
-            raise ValueError(
-                f"Asset type '{instrument_category}' not recognized for sell logic."
-            )
+        gross_revenue = _gross_amount(
+            instrument_category, quantity, original_price, "sell"
+        )
 
         total_fees = (
             details["market_fees"] + details.get("broker_fees", 0) + details["taxes"]
@@ -137,45 +145,65 @@ class TransactionService:
             if details["currency"] == "ARS"
             else (revenue * rate, revenue)
         )
-        quantity_to_sell = details["quantity"]
-        newly_closed_trades = []
-
-        for index, lot in matching_lots.iterrows():
-            if quantity_to_sell <= 0:
-                break
-            qty_from_lot = min(float(lot["quantity"]), quantity_to_sell)
-            proportion = qty_from_lot / float(lot["quantity"])
-            closed_trade = {
-                "ticker": lot["ticker"],
-                "quantity": qty_from_lot,
-                "buy_date": lot["purchase_date"],
-                "sell_date": details["date"],
-                "asset_type": lot.get("asset_type", "UNKNOWN"),
-                "total_cost_ars": lot["total_cost_ars"] * proportion,
-                "total_cost_usd": lot["total_cost_usd"] * proportion,
-                "total_revenue_ars": revenue_ars * (qty_from_lot / details["quantity"]),
-                "total_revenue_usd": revenue_usd * (qty_from_lot / details["quantity"]),
-                "buy_broker_transaction_id": lot.get("broker_transaction_id"),
-                "sell_broker_transaction_id": details.get("broker_transaction_id"),
-            }
-            newly_closed_trades.append(closed_trade)
-            open_lots.loc[index, "quantity"] -= qty_from_lot
-            open_lots.loc[index, "total_cost_ars"] -= closed_trade["total_cost_ars"]
-            open_lots.loc[index, "total_cost_usd"] -= closed_trade["total_cost_usd"]
-            quantity_to_sell -= qty_from_lot
-
-        self.portfolio.open_positions = open_lots.loc[
-            open_lots["quantity"] > 0.001
-        ].copy()
+        sale = split_fifo_sale(
+            lot_quantities,
+            ticker_lots["total_cost_ars"].to_numpy(dtype=float)[fifo_order],
+            ticker_lots["total_cost_usd"].to_numpy(dtype=float)[fifo_order],
+            details["quantity"],
+            revenue_ars,
+            revenue_usd,
+        )
+        consumed = sale.taken > 0
+        sold_lots = ticker_lots.iloc[fifo_order[consumed]]
+        qty_from_lots = sale.taken[consumed]
+        closed_costs_ars = sale.costs_ars[consumed]
+        closed_costs_usd = sale.costs_usd[consumed]
+
+        # Typed column arrays, so the frame is built without per-row dtype inference.
+        n_closed = len(qty_from_lots)
+        newly_closed_trades = {
+            "ticker": sold_lots["ticker"].to_numpy(dtype=object),
+            "quantity": qty_from_lots,
+            "buy_date": sold_lots["purchase_date"].to_numpy(dtype="datetime64[ns]"),
+            "sell_date": np.full(
+                n_closed, pd.Timestamp(details["date"]), dtype="datetime64[ns]"
+            ),
+            "asset_type": (
+                sold_lots["asset_type"].to_numpy(dtype=object)
+                if "asset_type" in sold_lots.columns
+                else np.full(n_closed, "UNKNOWN", dtype=object)
+            ),
+            "total_cost_ars": closed_costs_ars,
+            "total_cost_usd": closed_costs_usd,
+            "total_revenue_ars": sale.revenues_ars[consumed],
+            "total_revenue_usd": sale.revenues_usd[consumed],
+            "buy_broker_transaction_id": (
+                sold_lots["broker_transaction_id"].to_numpy()
+                if "broker_transaction_id" in sold_lots.columns
+                else np.full(n_closed, None, dtype=object)
+            ),
+            "sell_broker_transaction_id": np.full(
+                n_closed, details.get("broker_transaction_id"), dtype=object
+            ),
+        }
+        # Positional indexers skip the label lookups .loc would do.
+        open_lots.iloc[
+            ticker_positions[fifo_order[consumed]],
+            open_lots.columns.get_indexer(
+                ["quantity", "total_cost_ars", "total_cost_usd"]
+            ),
+        ] -= np.column_stack([qty_from_lots, closed_costs_ars, closed_costs_usd])
+
+        # Copy-on-Write makes the filtered frame independent without a .copy().
+        self.portfolio.open_positions = open_lots.loc[open_lots["quantity"] > 0.001]
         self.repository.save_open_positions(self.portfolio.open_positions)
         new_closed_df = pd.DataFrame(newly_closed_trades)
-        if self.portfolio.closed_trades.empty:
-            self.portfolio.closed_trades = new_closed_df
-        else:
-            self.portfolio.closed_trades = pd.concat(
-                [self.portfolio.closed_trades, new_closed_df], ignore_index=True
-            )
-        self.repository.save_closed_trades(self.portfolio.closed_trades)
+        self.portfolio.closed_trades = _append_rows(
+            self.portfolio.closed_trades, new_closed_df
+        )
+        self.repository.append_closed_trades(
+            new_closed_df, self.portfolio.closed_trades
+        )
 
     def expire_options(self):
         today = pd.Timestamp.now().normalize()
@@ -185,53 +213,41 @@ class TransactionService:
         ):
             return
 
-        option_mask = self.portfolio.open_positions["asset_type"] == "OPTION"
-        if not option_mask.any():
-            return
-
-        open_options = self.portfolio.open_positions[option_mask].copy()
-        if open_options.empty:
-            return
-
-        open_options["expiration_date"] = pd.to_datetime(
-            open_options["expiration_date"], errors="coerce"
+        positions = self.portfolio.open_positions
+        expiration_dates = positions["expiration_date"]
+        # Parsed at load; only rows appended in memory can leave it as object.
+        if not pd.api.types.is_datetime64_any_dtype(expiration_dates):
+            expiration_dates = pd.to_datetime(expiration_dates, errors="coerce")
+        expired_mask = (positions["asset_type"] == "OPTION") & (
+            expiration_dates < today
         )
-        expired: pd.DataFrame = open_options[
-            open_options["expiration_date"] < today
-        ].copy()
-        if expired.empty:
+        if not expired_mask.any():
             return
-
-        newly_closed_trades = []
-        for _, lot in expired.iterrows():
-            closed_trade = {
-                "ticker": lot["ticker"],
-                "quantity": lot["quantity"],
-                "buy_date": lot["purchase_date"],
-                "sell_date": lot["expiration_date"],
+        expired: pd.DataFrame = positions[expired_mask]
+
+        # Expired lots close at zero revenue on their expiration date.
+        new_closed_df = pd.DataFrame(
+            {
+                "ticker": expired["ticker"],
+                "quantity": expired["quantity"],
+                "buy_date": expired["purchase_date"],
+                "sell_date": expiration_dates[expired_mask],
                 "asset_type": "OPTION",
-                "total_cost_ars": lot["total_cost_ars"],
-                "total_cost_usd": lot["total_cost_usd"],
+                "total_cost_ars": expired["total_cost_ars"],
+                "total_cost_usd": expired["total_cost_usd"],
                 "total_revenue_ars": 0,
                 "total_revenue_usd": 0,
-                "buy_broker_transaction_id": lot.get("broker_transaction_id"),
+                "buy_broker_transaction_id": expired.get("broker_transaction_id"),
                 "sell_broker_transaction_id": "EXPIRED",
             }
-            newly_closed_trades.append(closed_trade)
+        ).reset_index(drop=True)
 
-        expired_indices = expired.index
-        self.portfolio.open_positions = self.portfolio.open_positions.drop(
-            expired_indices
+        self.portfolio.open_positions = positions[~expired_mask]
+        self.portfolio.closed_trades = _append_rows(
+            self.portfolio.closed_trades, new_closed_df
         )
-
-        if newly_closed_trades:
-            new_closed_df = pd.DataFrame(newly_closed_trades)
-            if self.portfolio.closed_trades.empty:
-                self.portfolio.closed_trades = new_closed_df
-            else:
-                self.portfolio.closed_trades = pd.concat(
-                    [self.portfolio.closed_trades, new_closed_df], ignore_index=True
-                )
-            self.repository.save_open_positions(self.portfolio.open_positions)
-            self.repository.save_closed_trades(self.portfolio.closed_trades)
-            print(f"INFO: Se procesaron {len(newly_closed_trades)} opciones expiradas.")
+        self.repository.save_open_positions(self.portfolio.open_positions)
+        self.repository.append_closed_trades(
+            new_closed_df, self.portfolio.closed_trades
+        )
+        print(f"INFO: Se procesaron {len(new_closed_df)} opciones expiradas.")
@@ -1,4 +1,7 @@
+from functools import cached_property
+
 import pandas as pd
+from src.shared.financial_utils import SortedSeries, to_sorted_series
 
 
 class Portfolio:
@@ -17,3 +20,21 @@ class Portfolio:
         self.dolar_ccl = dolar_ccl
         self.cer_data = cer_data
         self.cpi_usa = cpi_usa
+
+    # Sorted array views of the rate and index series, used for date lookups.
+    # Built on first use, so loads that never look up a series skip the work.
+    @cached_property
+    def dolar_mep_series(self) -> SortedSeries:
+        return to_sorted_series(self.dolar_mep)
+
+    @cached_property
+    def dolar_ccl_series(self) -> SortedSeries:
+        return to_sorted_series(self.dolar_ccl)
+
+    @cached_property
+    def cer_series(self) -> SortedSeries:
+        return to_sorted_series(self.cer_data)
+
+    @cached_property
+    def cpi_usa_series(self) -> SortedSeries:
+        return to_sorted_series(self.cpi_usa)
@@ -1,13 +1,14 @@
 import pandas as pd
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import cache
 import urllib3
 
 import config
-from .gateways.bcra_gateway import BCRAAPIGateway
-from .gateways.ambito_gateway import AmbitoGateway
 from .gateways.alpha_vantage_gateway import AlphaVantageAPIGateway
+from .gateways.instances import ambito_gateway, bcra_gateway
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -15,18 +16,35 @@ logging.basicConfig(
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+# Last date per file, reused while the file's mtime and size are unchanged.
+_LAST_DATE_CACHE: dict[str, tuple[tuple[float, int], pd.Timestamp | None]] = {}
+
+
 def _get_last_date_from_csv(file_path: str) -> pd.Timestamp | None:
     """Reads a CSV and returns the last date found, or None if empty/missing."""
-    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    if stat.st_size == 0:
         return None
+    stamp = (stat.st_mtime, stat.st_size)
+    cached = _LAST_DATE_CACHE.get(file_path)
+    if cached and cached[0] == stamp:
+        return cached[1]
     try:
-        df = pd.read_csv(file_path, parse_dates=["date"])
+        # Only the date column is read, as strings parsed with a fixed ISO format.
+        # Older Ambito batches were stored newest-first, so the max is taken.
+        df = pd.read_csv(file_path, usecols=lambda col: col == "date", dtype=str)
         if df.empty or "date" not in df.columns:
-            return None
-        return df["date"].max()
+            last_date = None
+        else:
+            last_date = pd.to_datetime(df["date"], format="ISO8601").max()
     except Exception as e:
         logging.error(f"Could not read last date from {file_path}: {e}")
         return None
+    _LAST_DATE_CACHE[file_path] = (stamp, last_date)
+    return last_date
 
 
 def _append_to_csv(file_path: str, new_data_df: pd.DataFrame):
@@ -68,10 +86,13 @@ def update_dolar_ambito(file_path: str, endpoint: str, asset_name: str):
         return
 
     logging.info(f"Updating {asset_name} data from {start_date} to {end_date}...")
-    gateway = AmbitoGateway()
-    raw_data = gateway.fetch_historical_data(endpoint, start_date, end_date)
+    raw_data = ambito_gateway.fetch_historical_data(endpoint, start_date, end_date)
     if raw_data:
-        df = gateway.parse_historical_data(raw_data)
+        # Ambito lists newest first; ascending files let readers skip the sort.
+        df = ambito_gateway.parse_historical_data(raw_data).sort_values("date")
+        if last_date is not None:
+            # Days already stored are never appended twice, whatever the API returns.
+            df = df[df["date"] > last_date]
         _append_to_csv(file_path, df)
 
 
@@ -92,7 +113,8 @@ def _update_full_history_series(
 ):
     """
     Updates series that provide full history in each call (like BCRA, AlphaVantage).
-    It overwrites the file to ensure data integrity.
+    The file is written in full the first time; afterwards only the records
+    newer than its last date are appended.
     """
     # For these series, a daily check is sufficient.
     last_date = _get_last_date_from_csv(file_path)
@@ -106,37 +128,65 @@ def _update_full_history_series(
         logging.warning(f"No data received for {asset_name}. Skipping save.")
         return
 
-    records = []
-    for record in api_data:
-        try:
-            date_val = record.get(date_key)
-            val = record.get(value_key)
-            if date_val is None or val is None:
-                continue
-            record_date = pd.to_datetime(date_val).normalize()
-            value = float(str(val).replace(",", "."))
-            records.append({"date": record_date, "value": value})
-        except (ValueError, TypeError, KeyError):
-            continue
-
-    if records:
-        df = pd.DataFrame(records).drop_duplicates(subset="date").sort_values("date")
-        df.to_csv(file_path, index=False, date_format="%Y-%m-%d")
-        logging.info(
-            f"Successfully saved full history for {os.path.basename(file_path)} with {len(df)} records."
-        )
+    # Records missing either field are dropped; the rest is parsed column-wise.
+    raw = pd.DataFrame(api_data, columns=[date_key, value_key]).dropna()
+    if last_date is not None:
+        # ISO date strings sort like dates, so history already on disk is pruned
+        # with a string comparison before anything is parsed.
+        raw = raw[raw[date_key].astype(str) > last_date.strftime("%Y-%m-%d")]
+    values = pd.to_numeric(
+        raw[value_key].astype(str).str.replace(",", ".", regex=False),
+        errors="coerce",
+    )
+    # One vectorized parse; cache=True converts each repeated date string once.
+    # Both APIs send ISO dates, and an explicit format keeps pandas off the
+    # per-element inference path.
+    dates = pd.to_datetime(
+        raw[date_key], format="ISO8601", errors="coerce", cache=True
+    ).dt.normalize()
+    keep = dates.notna() & values.notna()
+    if last_date is not None:
+        # Records already on disk are masked out before any dedup or sort work.
+        keep &= dates > last_date
+    df = pd.DataFrame({"date": dates, "value": values})[keep]
+    df = df.drop_duplicates(subset="date").sort_values("date")
+
+    if df.empty:
+        logging.info(f"{asset_name} has no records newer than the stored history.")
+        return
+    if last_date is not None:
+        _append_to_csv(file_path, df)
+        return
+    df.to_csv(file_path, index=False, date_format="%Y-%m-%d")
+    logging.info(
+        f"Successfully saved full history for {os.path.basename(file_path)} with {len(df)} records."
+    )
 
 
 def update_cer():
-    connector = BCRAAPIGateway()
-    fetch_func = lambda: connector.get_series_data(
+    fetch_func = lambda: bcra_gateway.get_series_data(
         variable_id=30, start_date="", end_date=""
     )
     _update_full_history_series(config.CER_FILE, "CER", fetch_func, "fecha", "valor")
 
 
+@cache
+def _alpha_vantage_gateway() -> AlphaVantageAPIGateway:
+    # Built on first use, since the gateway refuses to start without an API key.
+    return AlphaVantageAPIGateway()
+
+
 def update_cpi_usa():
-    connector = AlphaVantageAPIGateway()
+    connector = _alpha_vantage_gateway()
     _update_full_history_series(
         config.CPI_USA_FILE, "USA CPI", connector.get_cpi_data, "date", "value"
     )
+
+
+def update_all_data():
+    """Runs every market data update concurrently; each one writes its own file."""
+    updates = [update_cer, update_cpi_usa, update_dolar_mep, update_dolar_ccl]
+    with ThreadPoolExecutor(max_workers=len(updates)) as executor:
+        futures = [executor.submit(update) for update in updates]
+        for future in futures:
+            future.result()
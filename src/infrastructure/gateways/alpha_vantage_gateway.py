@@ -1,6 +1,16 @@
+import json
 import os
+import time
 import requests
 import logging
+from datetime import timedelta
+
+import config
+
+from .http_session import build_session, decode_json
+
+# Throttling and error replies, which must not be served from the cache.
+_UNCACHEABLE_KEYS = frozenset({"Note", "Information", "Error Message"})
 
 
 class AlphaVantageAPIGateway:
@@ -14,17 +24,46 @@ class AlphaVantageAPIGateway:
         self.api_key = api_key or retrieved_key
         if not self.api_key:
             raise ValueError("Alpha Vantage API key is not set or provided.")
+        self._session = build_session()
+
+    @staticmethod
+    def _save_cache(cache_path: str, api_response: dict):
+        try:
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(api_response, f)
+        except OSError as e:
+            logging.warning(f"Could not cache Alpha Vantage response: {e}")
+
+    @staticmethod
+    def _cache_path(params: dict) -> str:
+        key = "_".join(f"{k}-{v}" for k, v in sorted(params.items()))
+        return os.path.join(config.DATA_DIR, f"alpha_vantage_{key}.json")
+
+    def _make_request(self, params: dict, max_age: timedelta | None = None):
+        """
+        Helper function to perform API requests.
+        With max_age, a response saved to disk within that window is returned
+        instead of calling the API, which throttles the free tier heavily.
+        """
+        cache_path = self._cache_path(params) if max_age else None
+        if cache_path:
+            try:
+                if time.time() - os.path.getmtime(cache_path) < max_age.total_seconds():
+                    with open(cache_path, encoding="utf-8") as f:
+                        return json.load(f)
+            except (OSError, ValueError):
+                pass
 
-    def _make_request(self, params: dict):
-        """Helper function to perform API requests."""
         params["apikey"] = self.api_key
         try:
-            response = requests.get(self.BASE_URL, params=params, timeout=15)
+            response = self._session.get(self.BASE_URL, params=params, timeout=15)
             response.raise_for_status()
-            api_response = response.json()
+            api_response = decode_json(response)
 
             if note := api_response.get("Note"):
                 logging.warning(f"Note from Alpha Vantage API: {note}")
+            elif cache_path and not _UNCACHEABLE_KEYS & api_response.keys():
+                self._save_cache(cache_path, api_response)
 
             return api_response
         except requests.exceptions.RequestException as e:
@@ -37,7 +76,8 @@ class AlphaVantageAPIGateway:
     def get_cpi_data(self):
         """Fetches the monthly US CPI data series."""
         params = {"function": "CPI", "interval": "monthly", "datatype": "json"}
-        response = self._make_request(params)
+        # CPI is published monthly, so a half-day-old response is still current.
+        response = self._make_request(params, max_age=timedelta(hours=12))
         return response.get("data", []) if response else []
 
     def get_quote_endpoint(self, symbol: str):
@@ -1,11 +1,18 @@
 import requests
 import logging
+import numpy as np
 import pandas as pd
 
+from .http_session import build_session, decode_json
+
 class AmbitoGateway:
     BASE_URL = "https://mercados.ambito.com"
     USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 
+    def __init__(self):
+        # One keep-alive session per gateway instead of a new connection per call.
+        self._session = build_session({'User-Agent': self.USER_AGENT})
+
     def fetch_historical_data(self, endpoint: str, start_date: str, end_date: str):
         """
         Fetches historical data from a specific Ambito endpoint.
@@ -21,9 +28,9 @@ class AmbitoGateway:
         """
         url = f"{self.BASE_URL}/{endpoint}/historico-general/{start_date}/{end_date}"
         try:
-            response = requests.get(url, headers={'User-Agent': self.USER_AGENT}, timeout=15, verify=True)
+            response = self._session.get(url, timeout=15, verify=True)
             response.raise_for_status()
-            json_response = response.json()
+            json_response = decode_json(response)
             return json_response[1:] if len(json_response) > 1 else []
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching data from Ambito: {e}")
@@ -45,8 +52,12 @@ class AmbitoGateway:
         if not data_rows:
             return pd.DataFrame(columns=['date', 'value'])
 
-        df = pd.DataFrame(data_rows, columns=['date_str', 'value_str'])
-        df['date'] = pd.to_datetime(df['date_str'], format='%d/%m/%Y')
-        df['value'] = df['value_str'].str.replace(',', '.').astype(float)
-
-        return df[['date', 'value']]
+        # Both columns are parsed straight from the raw rows into typed arrays,
+        # so the frame is assembled once with no intermediate string columns.
+        # Object dtype keeps null cells as None, which parse to NaT/NaN.
+        rows = np.asarray(data_rows, dtype=object)
+        values = pd.Series(rows[:, 1]).str.replace(',', '.', regex=False)
+        return pd.DataFrame({
+            'date': pd.to_datetime(rows[:, 0], format='%d/%m/%Y', cache=True),
+            'value': pd.to_numeric(values, errors='coerce'),
+        })
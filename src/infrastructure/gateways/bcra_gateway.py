@@ -1,12 +1,17 @@
 import requests
 import logging
 
+from .http_session import build_session
+
 
 class BCRAAPIGateway:
     """Manages the connection and data fetching from the BCRA Statistics API."""
 
     BASE_URL = "https://api.bcra.gob.ar/estadisticas/v3.0/monetarias"
 
+    def __init__(self):
+        self._session = build_session({"Accept": "application/json"})
+
     def get_series_data(
         self, variable_id: int, start_date: str, end_date: str, verify_ssl: bool = True
     ):
@@ -17,7 +22,7 @@ class BCRAAPIGateway:
         url = f"{self.BASE_URL}/{variable_id}"
 
         try:
-            response = requests.get(url, timeout=15, verify=verify_ssl)
+            response = self._session.get(url, timeout=15, verify=verify_ssl)
             response.raise_for_status()
             data = response.json()
             return data.get("results", [])
@@ -1,22 +1,73 @@
 import requests
 import logging
 import config
-from functools import lru_cache
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .http_session import build_session
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 
+# Segundos que una respuesta se considera vigente, por familia de endpoints.
+_CACHE_TTLS = {"/live/": 5, "/historical/": 3600, "/eod/": 21600}
+
+# Máximo de respuestas guardadas; al superarlo se descarta la menos usada.
+_CACHE_MAXSIZE = 64
+
+# Endpoints en vivo que get_all_live consulta en paralelo.
+_LIVE_ENDPOINTS = {
+    "mep": "/live/mep",
+    "ccl": "/live/ccl",
+    "arg_stocks": "/live/arg_stocks",
+    "arg_options": "/live/arg_options",
+    "arg_bonds": "/live/arg_bonds",
+    "arg_notes": "/live/arg_notes",
+}
+
 
 class Data912APIConnector:
     def __init__(self, timeout: int = 15):
         self.base_url = config.DATA912_API_URL
         self.timeout = timeout
+        # Shared by every call, so repeated fetches reuse one keep-alive connection.
+        self._session = build_session({"Accept": "application/json"})
+        self._cache: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._cache_lock = threading.Lock()
         logging.info(f"Conector inicializado para la URL base: {self.base_url}")
 
-    @lru_cache(maxsize=16)
     def _make_request(self, endpoint: str):
+        """
+        Devuelve la respuesta del endpoint, reutilizándola mientras siga vigente.
+        Los errores no se guardan, así que el siguiente llamado vuelve a intentar.
+        Solo se conservan las _CACHE_MAXSIZE respuestas usadas más recientemente.
+        """
+        ttl = next(
+            (ttl for prefix, ttl in _CACHE_TTLS.items() if endpoint.startswith(prefix)),
+            0,
+        )
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._cache.get(endpoint)
+            if cached:
+                self._cache.move_to_end(endpoint)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+
+        data = self._fetch(endpoint)
+        if data is not None and ttl:
+            with self._cache_lock:
+                self._cache[endpoint] = (now, data)
+                self._cache.move_to_end(endpoint)
+                if len(self._cache) > _CACHE_MAXSIZE:
+                    self._cache.popitem(last=False)
+        return data
+
+    def _fetch(self, endpoint: str):
         """
         Método auxiliar para realizar peticiones GET a la API.
 
@@ -29,7 +80,7 @@ class Data912APIConnector:
         url = f"{self.base_url}{endpoint}"
         logging.info(f"Contactando API en el endpoint: {endpoint}")
         try:
-            response = requests.get(url, timeout=self.timeout, verify=True)
+            response = self._session.get(url, timeout=self.timeout, verify=True)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
@@ -45,6 +96,15 @@ class Data912APIConnector:
 
         return None
 
+    def get_all_live(self) -> dict:
+        """
+        Consulta los endpoints en vivo en paralelo, así la espera total es la del
+        más lento y no la suma. Devuelve las respuestas por nombre (None si fallan).
+        """
+        with ThreadPoolExecutor(max_workers=len(_LIVE_ENDPOINTS)) as executor:
+            results = executor.map(self._make_request, _LIVE_ENDPOINTS.values())
+            return dict(zip(_LIVE_ENDPOINTS, results))
+
     def get_mep(self):
         return self._make_request("/live/mep")
 
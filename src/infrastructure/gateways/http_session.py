@@ -0,0 +1,35 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional; the standard decoder is used without it
+    orjson = None
+
+
+def build_session(headers: dict | None = None) -> requests.Session:
+    """
+    Returns a Session that keeps connections alive between calls and retries
+    transient server errors with a short backoff.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=32,
+        max_retries=Retry(
+            total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def decode_json(response: requests.Response):
+    """Decodes a JSON response body, with orjson when it is installed."""
+    if orjson is None:
+        return response.json()
+    return orjson.loads(response.content)
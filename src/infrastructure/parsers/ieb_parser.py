@@ -1,21 +1,32 @@
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from src.shared.types import TransactionData
 
+_OP_TYPE_MAP = {
+    "CPRA": "BUY",
+    "VTAS": "SELL",
+    "DIV": "DIVIDEND",
+}
+
+# Offset al final de un timestamp ISO ("Z", "-03:00", "-0300").
+_ISO_OFFSET_RE = r"(T[\d:.]+)(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+def _wall_clock(value) -> Optional[pd.Timestamp]:
+    """Parses a timestamp keeping its local wall-clock time, without tz."""
+    date = pd.to_datetime(value)
+    if date is not None and date.tzinfo is not None:
+        date = date.tz_localize(None)
+    return date
+
 
 def parse_ieb_movement(movement: Dict[str, Any]) -> Optional[TransactionData]:
     """
     Parses a movement from the IEB API into a TransactionData object.
     If the movement cannot be parsed, returns None.
     """
-    op_type_map = {
-        "CPRA": "BUY",
-        "VTAS": "SELL",
-        "DIV": "DIVIDEND",
-    }
-
     operation = movement.get("operation")
-    if operation not in op_type_map:
+    if operation not in _OP_TYPE_MAP:
         return None
 
     asset_type = "ACCION"
@@ -26,9 +37,9 @@ def parse_ieb_movement(movement: Dict[str, Any]) -> Optional[TransactionData]:
             return None
 
         parsed: TransactionData = {
-            "op_type": op_type_map[operation],
+            "op_type": _OP_TYPE_MAP[operation],
             "broker_transaction_id": movement.get("documentKey"),
-            "date": pd.to_datetime(movement.get("operationDate")),
+            "date": _wall_clock(movement.get("operationDate")),
             "ticker": movement.get("especie"),
             "quantity": quantity,
             "price": float(movement.get("price", 0)),
@@ -42,3 +53,55 @@ def parse_ieb_movement(movement: Dict[str, Any]) -> Optional[TransactionData]:
     except (ValueError, TypeError) as e:
         print(f"Error parseando movimiento {movement.get('documentKey')}: {e}")
         return None
+
+
+def parse_ieb_movements(movements: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Parses a batch of IEB movements column-wise, one TransactionData row each.
+    Movements that cannot be parsed are dropped instead of returned as None.
+    """
+    raw = pd.DataFrame.from_records(
+        movements,
+        columns=[
+            "operation",
+            "amount",
+            "documentKey",
+            "operationDate",
+            "especie",
+        ],
+    )
+    op_type = raw["operation"].map(_OP_TYPE_MAP)
+    quantity = pd.to_numeric(raw["amount"], errors="coerce").abs()
+    # Like the single-row parser, a missing price means 0 but an explicit None
+    # makes the movement invalid.
+    price = pd.to_numeric(
+        pd.Series([m.get("price", 0) for m in movements], dtype=object),
+        errors="coerce",
+    )
+    # The broker mixes naive and offset timestamps; like parse_ieb_movement, each
+    # keeps its local wall-clock time and the offset is dropped.
+    date = pd.to_datetime(
+        raw["operationDate"].str.replace(_ISO_OFFSET_RE, r"\1", regex=True),
+        format="ISO8601",
+        errors="coerce",
+    )
+    valid = op_type.notna() & (quantity > 0) & price.notna() & date.notna()
+
+    parsed = pd.DataFrame(
+        {
+            "op_type": op_type,
+            "broker_transaction_id": raw["documentKey"],
+            "date": date,
+            "ticker": raw["especie"],
+            "quantity": quantity,
+            "price": price,
+        }
+    )[valid].reset_index(drop=True)
+    # Same defaults as parse_ieb_movement: this endpoint reports no fees.
+    return parsed.assign(
+        asset_type="ACCION",
+        currency="ARS",
+        market_fees=0.0,
+        broker_fees=0.0,
+        taxes=0.0,
+    )
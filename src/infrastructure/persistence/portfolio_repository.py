@@ -1,39 +1,98 @@
+import csv
 import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import config
 import logging
 from src.domain.portfolio import Portfolio
 
+# Declared column dtypes, so the parser does not have to infer them.
+# Low-cardinality strings become categoricals; columns a file lacks are ignored.
+_COLUMN_DTYPES = {
+    **dict.fromkeys(
+        [
+            "ticker",
+            "asset_type",
+            "original_currency",
+            "option_type",
+            "underlying_asset",
+        ],
+        "category",
+    ),
+    **dict.fromkeys(
+        [
+            "quantity",
+            "total_cost_ars",
+            "total_cost_usd",
+            "total_revenue_ars",
+            "total_revenue_usd",
+            "market_fees",
+            "broker_fees",
+            "taxes",
+            "lotes",
+            "strike_price",
+            "value",
+        ],
+        "float64",
+    ),
+}
+
+# Parsed CSVs keyed by (path, parse_dates), reused while mtime and size are unchanged.
+_CSV_CACHE: dict[tuple[str, tuple], tuple[tuple[int, int], pd.DataFrame]] = {}
+
 
 class PortfolioRepository:
     """Manages loading and saving all portfolio data."""
 
     def _load_csv(self, file_path: str, parse_dates: list = None) -> pd.DataFrame:
-        if not (os.path.exists(file_path) and os.path.getsize(file_path) > 0):
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
             return pd.DataFrame()
+        if stat.st_size == 0:
+            return pd.DataFrame()
+        cache_key = (file_path, tuple(parse_dates or ()))
+        # Size catches rewrites within the filesystem's timestamp granularity.
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _CSV_CACHE.get(cache_key)
+        if cached and cached[0] == stamp:
+            # Callers may add columns; the shallow copy keeps the cache intact.
+            return cached[1].copy(deep=False)
         try:
-            df = pd.read_csv(file_path)
+            df = pd.read_csv(file_path, dtype=_COLUMN_DTYPES)
             if parse_dates:
                 existing_date_cols = [col for col in parse_dates if col in df.columns]
                 for col in existing_date_cols:
                     df[col] = pd.to_datetime(df[col], errors="coerce")
-            return df
+            _CSV_CACHE[cache_key] = (stamp, df)
+            return df.copy(deep=False)
         except Exception as e:
             logging.error(f"Could not load or parse CSV file at {os.path.basename(file_path)}: {e}")
             return pd.DataFrame()
 
     def load_full_portfolio(self) -> Portfolio:
         """Loads all data files and instantiates the Portfolio domain object."""
-        open_positions = self._load_csv(
-            config.OPEN_POSITIONS_FILE, ["purchase_date", "expiration_date"]
-        )
-        closed_trades = self._load_csv(
-            config.CLOSED_TRADES_FILE, ["buy_date", "sell_date"]
-        )
-        dolar_mep = self._load_csv(config.DOLAR_MEP_FILE, ["date"])
-        dolar_ccl = self._load_csv(config.DOLAR_CCL_FILE, ["date"])
-        cer_data = self._load_csv(config.CER_FILE, ["date"])
-        cpi_usa = self._load_csv(config.CPI_USA_FILE, ["date"])
+        files = [
+            (config.OPEN_POSITIONS_FILE, ["purchase_date", "expiration_date"]),
+            (config.CLOSED_TRADES_FILE, ["buy_date", "sell_date"]),
+            (config.DOLAR_MEP_FILE, ["date"]),
+            (config.DOLAR_CCL_FILE, ["date"]),
+            (config.CER_FILE, ["date"]),
+            (config.CPI_USA_FILE, ["date"]),
+        ]
+        # The files are independent, so they are read concurrently.
+        with ThreadPoolExecutor(max_workers=len(files)) as executor:
+            loaded = list(executor.map(lambda args: self._load_csv(*args), files))
+        open_positions, closed_trades, dolar_mep, dolar_ccl, cer_data, cpi_usa = loaded
+
+        # Asset types are canonicalized once here so lookups need no case folding.
+        # On a categorical, map only touches the categories, not every row.
+        if "asset_type" in open_positions.columns:
+            open_positions["asset_type"] = (
+                open_positions["asset_type"]
+                .map(str.upper, na_action="ignore")
+                .astype("category")
+            )
 
         return Portfolio(
             open_positions, closed_trades, dolar_mep, dolar_ccl, cer_data, cpi_usa
@@ -50,3 +109,27 @@ class PortfolioRepository:
         closed_trades_df.to_csv(
             config.CLOSED_TRADES_FILE, index=False, date_format="%Y-%m-%d"
         )
+
+    def append_closed_trades(
+        self, new_trades_df: pd.DataFrame, closed_trades_df: pd.DataFrame
+    ):
+        """
+        Appends new closed trades to their CSV file instead of rewriting it.
+        Falls back to a full save when the file is missing or its header lacks
+        any of the new columns.
+        """
+        try:
+            with open(config.CLOSED_TRADES_FILE, newline="", encoding="utf-8") as f:
+                header = next(csv.reader(f), None)
+        except FileNotFoundError:
+            header = None
+        if not header or not set(new_trades_df.columns) <= set(header):
+            self.save_closed_trades(closed_trades_df)
+            return
+        new_trades_df.reindex(columns=header).to_csv(
+            config.CLOSED_TRADES_FILE,
+            mode="a",
+            header=False,
+            index=False,
+            date_format="%Y-%m-%d",
+        )
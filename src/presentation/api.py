@@ -34,35 +34,25 @@ def inject_services(f):
     return decorated_function
 
 
+def _is_recorded_id(portfolio, broker_id: str) -> bool:
+    """Checks the stored broker ids column by column, stopping at the first match."""
+    id_columns = [
+        (portfolio.open_positions, "broker_transaction_id"),
+        (portfolio.closed_trades, "buy_broker_transaction_id"),
+        (portfolio.closed_trades, "sell_broker_transaction_id"),
+    ]
+    return any(
+        column in df.columns and df[column].dropna().astype(str).eq(broker_id).any()
+        for df, column in id_columns
+    )
+
+
 def check_duplicate(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         data = request.get_json()
         broker_id = str(data.get("id"))
-        portfolio = g.portfolio
-        processed_ids = set()
-        if (
-            not portfolio.open_positions.empty
-            and "broker_transaction_id" in portfolio.open_positions.columns
-        ):
-            ids = portfolio.open_positions["broker_transaction_id"].dropna().astype(str)
-            processed_ids.update(ids)
-        if not portfolio.closed_trades.empty:
-            if "buy_broker_transaction_id" in portfolio.closed_trades.columns:
-                ids = (
-                    portfolio.closed_trades["buy_broker_transaction_id"]
-                    .dropna()
-                    .astype(str)
-                )
-                processed_ids.update(ids)
-            if "sell_broker_transaction_id" in portfolio.closed_trades.columns:
-                ids = (
-                    portfolio.closed_trades["sell_broker_transaction_id"]
-                    .dropna()
-                    .astype(str)
-                )
-                processed_ids.update(ids)
-        if broker_id in processed_ids:
+        if _is_recorded_id(g.portfolio, broker_id):
             return jsonify(
                 {
                     "status": "skipped_duplicate",
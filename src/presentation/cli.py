@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
@@ -16,6 +17,14 @@ def print_menu():
     print("6. Exit")
 
 
+def _format_dates(dates: pd.Series) -> pd.Series:
+    """Formats datetime64 values as dd-mm-YYYY, calling strftime once per date."""
+    codes, uniques = pd.factorize(dates)
+    # Missing dates have code -1, which picks the trailing NaN.
+    labels = np.append(uniques.strftime("%d-%m-%Y").to_numpy(dtype=object), np.nan)
+    return pd.Series(labels[codes], index=dates.index)
+
+
 def display_open_positions_report(report_data: dict[str, pd.DataFrame]):
     consolidated_df = report_data.get("consolidated", pd.DataFrame())
     print("\n--- Stocks, CEDEARs, Bonds (Consolidated Performance) ---")
@@ -60,9 +69,8 @@ def display_open_positions_report(report_data: dict[str, pd.DataFrame]):
     options_df = report_data.get("options", pd.DataFrame())
     print("\n--- Options (Holdings) ---")
     if not options_df.empty:
-        options_df["purchase_date"] = pd.to_datetime(
-            options_df["purchase_date"]
-        ).dt.strftime("%d-%m-%Y")
+        # purchase_date is parsed to datetime64 when the portfolio is loaded.
+        options_df["purchase_date"] = _format_dates(options_df["purchase_date"])
         option_cols = ["purchase_date", "ticker", "quantity", "total_cost_ars"]
         print(options_df[option_cols].round(2).to_string(index=False))
     else:
@@ -84,12 +92,9 @@ def display_closed_trades_report(report_df: pd.DataFrame):
         "nominal_return_usd_pct": "Nom. Ret. USD (%)",
         "real_return_usd_pct": "Real Ret. USD (%)",
     }
-    report_df["buy_date"] = pd.to_datetime(report_df["buy_date"]).dt.strftime(
-        "%d-%m-%Y"
-    )
-    report_df["sell_date"] = pd.to_datetime(report_df["sell_date"]).dt.strftime(
-        "%d-%m-%Y"
-    )
+    # Dates arrive as datetime64 from the report, so they only need formatting.
+    report_df["buy_date"] = _format_dates(report_df["buy_date"])
+    report_df["sell_date"] = _format_dates(report_df["sell_date"])
     display_df = report_df.rename(columns=display_cols)[list(display_cols.values())]
     print(display_df.round(2).to_string(index=False))
 
@@ -204,10 +209,7 @@ def main():
             print("\nFetching market data and calculating performance...")
             from src.infrastructure import data_fetcher
 
-            data_fetcher.update_cer()
-            data_fetcher.update_cpi_usa()
-            data_fetcher.update_dolar_mep()
-            data_fetcher.update_dolar_ccl()
+            data_fetcher.update_all_data()
 
             updated_portfolio = repository.load_full_portfolio()
             updated_reporting_service = ReportingService(updated_portfolio)
@@ -223,10 +225,7 @@ def main():
             print("\nStarting economic data update...")
             from src.infrastructure import data_fetcher
 
-            data_fetcher.update_cer()
-            data_fetcher.update_cpi_usa()
-            data_fetcher.update_dolar_mep()
-            data_fetcher.update_dolar_ccl()
+            data_fetcher.update_all_data()
             print("Economic data update process finished.")
 
         elif choice == "5":
@@ -1,49 +1,183 @@
+import numpy as np
 import pandas as pd
 import re
+from typing import NamedTuple
 from config import FALLBACK_MONTHLY_INFLATION_RATE
 
+# Option names look like "GFGC5000 (C) 5.000,00"; dots are stripped before matching.
+_OPTION_NAME_RE = re.compile(r"^([A-Z0-9]+)\s*\((C|V)\)\s*([\d,\.]+)")
 
-def _get_cpi_value_for_date(
-    target_date: pd.Timestamp, cpi_df: pd.DataFrame
-) -> float | None:
-    if cpi_df.empty or pd.isna(target_date):
-        return None
-
-    cpi_df["date"] = pd.to_datetime(cpi_df["date"])
-    target_date = pd.to_datetime(target_date)
-
-    cpi_df = cpi_df.sort_values("date").reset_index(drop=True)
-
-    last_available_date = cpi_df["date"].max()
-
-    if target_date <= last_available_date:
-        lookup_df = pd.DataFrame({"date": [target_date]})
-        merged = pd.merge_asof(lookup_df, cpi_df, on="date", direction="nearest")
-        return merged["value"].iloc[0] if not merged.empty else None
-
-    else:
-        months_diff = (target_date.year - last_available_date.year) * 12 + (
-            target_date.month - last_available_date.month
+# Broker instrument types that are used as the asset type unchanged.
+_KNOWN_INSTRUMENT_TYPES = frozenset(
+    {
+        "CEDEAR",
+        "MERVAL",
+        "GENERAL",
+        "LIDER",
+        "PRIVATE_TITLE",
+        "BOND",
+        "LETTER",
+        "PUBLIC_TITLE",
+    }
+)
+# Operation types used as the asset type when the instrument type is unknown.
+_OPERATION_TYPE_FALLBACKS = frozenset({"PUBLIC_TITLE", "PRIVATE_TITLE"})
+
+
+def lookup_nearest(
+    series_dates: np.ndarray, series_values: np.ndarray, target_dates: np.ndarray
+) -> np.ndarray:
+    """
+    Returns the value at the nearest date of a date-sorted series for each target.
+    Ties go to the earlier date, matching merge_asof(direction="nearest").
+    """
+    last = len(series_dates) - 1
+    right = np.minimum(np.searchsorted(series_dates, target_dates), last)
+    left = np.maximum(right - 1, 0)
+    before = target_dates - series_dates[left]
+    after = series_dates[right] - target_dates
+    return series_values[np.where(before <= after, left, right)]
+
+
+def sort_series_by_date(series_df: pd.DataFrame) -> pd.DataFrame:
+    """Returns a date/value series with parsed dates in ascending order."""
+    dates = series_df["date"]
+    if pd.api.types.is_datetime64_any_dtype(dates) and dates.is_monotonic_increasing:
+        return series_df
+    return series_df.assign(date=pd.to_datetime(dates)).sort_values("date")
+
+
+class SortedSeries(NamedTuple):
+    """A date/value series as parallel arrays sorted by date."""
+
+    dates: np.ndarray
+    values: np.ndarray
+
+
+def to_sorted_series(series_df: pd.DataFrame) -> SortedSeries:
+    """Converts a date/value DataFrame into date-sorted NumPy arrays."""
+    if series_df.empty:
+        return SortedSeries(
+            np.array([], dtype="datetime64[ns]"), np.array([], dtype=float)
         )
-        if len(cpi_df) >= 7:
-            recent_cpi = cpi_df.tail(7)
-            monthly_returns = recent_cpi["value"].pct_change().dropna()
+    series_df = sort_series_by_date(series_df)
+    return SortedSeries(
+        series_df["date"].to_numpy(dtype="datetime64[ns]"),
+        series_df["value"].to_numpy(dtype=float),
+    )
+
+
+def _get_cpi_values_for_dates(
+    target_dates, cpi: pd.DataFrame | SortedSeries
+) -> np.ndarray:
+    """
+    Looks up the CPI value for every target date in one pass.
+    Dates within the series take the nearest value; later dates are projected
+    from the recent average monthly inflation. NaN where no value applies.
+    """
+    target_ns = pd.to_datetime(np.atleast_1d(target_dates)).to_numpy(
+        dtype="datetime64[ns]"
+    )
+    values = np.full(len(target_ns), np.nan)
+    if isinstance(cpi, pd.DataFrame):
+        cpi = to_sorted_series(cpi)
+    cpi_dates, cpi_values = cpi
+    if not len(cpi_dates):
+        return values
+
+    valid = ~np.isnat(target_ns)
+    in_range = valid & (target_ns <= cpi_dates[-1])
+
+    values[in_range] = lookup_nearest(cpi_dates, cpi_values, target_ns[in_range])
+
+    projected = valid & ~in_range
+    if projected.any():
+        # Calendar months between the last CPI date and each projected date.
+        months_diff = (
+            target_ns[projected].astype("datetime64[M]")
+            - cpi_dates[-1].astype("datetime64[M]")
+        ).astype(np.int64)
+        if len(cpi_values) >= 7:
+            monthly_returns = pd.Series(cpi_values[-7:]).pct_change().dropna()
             avg_monthly_inflation = monthly_returns.mean()
         else:
             avg_monthly_inflation = FALLBACK_MONTHLY_INFLATION_RATE
-        last_cpi_value = cpi_df["value"].iloc[-1]
-        projected_cpi = last_cpi_value * ((1 + avg_monthly_inflation) ** months_diff)
-        return projected_cpi
-
-
-def calculate_inflation_period(start_date, end_date, cpi_df: pd.DataFrame) -> float:
-    start_val = _get_cpi_value_for_date(pd.to_datetime(start_date), cpi_df)
-    end_val = _get_cpi_value_for_date(pd.to_datetime(end_date), cpi_df)
-
-    if start_val is None or end_val is None or start_val == 0:
-        return 0.0
+        values[projected] = cpi_values[-1] * (
+            (1 + avg_monthly_inflation) ** months_diff
+        )
 
-    return (end_val / start_val) - 1.0
+    return values
+
+
+def calculate_inflation_periods(
+    start_dates, end_dates, cpi: pd.DataFrame | SortedSeries
+) -> np.ndarray:
+    """Vectorized calculate_inflation_period; either argument may be a single date."""
+    starts, ends = np.broadcast_arrays(
+        pd.to_datetime(np.atleast_1d(start_dates)).to_numpy(dtype="datetime64[ns]"),
+        pd.to_datetime(np.atleast_1d(end_dates)).to_numpy(dtype="datetime64[ns]"),
+    )
+    # Start and end dates share a single lookup against the CPI series.
+    cpi_values = _get_cpi_values_for_dates(np.concatenate([starts, ends]), cpi)
+    start_vals, end_vals = np.split(cpi_values, 2)
+    valid = ~np.isnan(start_vals) & ~np.isnan(end_vals) & (start_vals != 0)
+    return np.where(valid, end_vals / np.where(valid, start_vals, 1.0) - 1.0, 0.0)
+
+
+def calculate_inflation_period(
+    start_date, end_date, cpi: pd.DataFrame | SortedSeries
+) -> float:
+    return float(calculate_inflation_periods(start_date, end_date, cpi)[0])
+
+
+def allocate_fifo(lot_quantities: np.ndarray, quantity_to_sell: float) -> np.ndarray:
+    """
+    Splits a sell quantity across lots sorted oldest first.
+    Returns the quantity taken from each lot in a single cumulative-sum pass.
+    """
+    consumed_before = np.cumsum(lot_quantities) - lot_quantities
+    return np.clip(quantity_to_sell - consumed_before, 0, lot_quantities)
+
+
+class FifoSale(NamedTuple):
+    """Per-lot result of a FIFO sale; lots that were not touched hold zeros."""
+
+    taken: np.ndarray
+    proportions: np.ndarray
+    costs_ars: np.ndarray
+    costs_usd: np.ndarray
+    revenues_ars: np.ndarray
+    revenues_usd: np.ndarray
+
+
+def split_fifo_sale(
+    lot_quantities: np.ndarray,
+    lot_costs_ars: np.ndarray,
+    lot_costs_usd: np.ndarray,
+    quantity_to_sell: float,
+    revenue_ars: float,
+    revenue_usd: float,
+) -> FifoSale:
+    """
+    Allocates a sale across lots sorted oldest first.
+    proportions is the fraction of each lot sold; lot costs close by it, and the
+    revenue is shared by each lot's part of the quantity sold.
+    """
+    taken = allocate_fifo(lot_quantities, quantity_to_sell)
+    proportions = np.divide(
+        taken, lot_quantities, out=np.zeros_like(taken), where=lot_quantities > 0
+    )
+    revenue_shares = (
+        taken / quantity_to_sell if quantity_to_sell > 0 else np.zeros_like(taken)
+    )
+    return FifoSale(
+        taken,
+        proportions,
+        proportions * lot_costs_ars,
+        proportions * lot_costs_usd,
+        revenue_ars * revenue_shares,
+        revenue_usd * revenue_shares,
+    )
 
 
 def map_instrument_to_asset_type(instrument: dict) -> str:
@@ -55,25 +189,11 @@ def map_instrument_to_asset_type(instrument: dict) -> str:
         return "OPTION"
 
     instrument_type = instrument.get("type", "").upper()
-    if instrument_type == "CEDEAR":
-        return "CEDEAR"
-
-    known_types = [
-        "MERVAL",
-        "GENERAL",
-        "LIDER",
-        "PRIVATE_TITLE",
-        "BOND",
-        "LETTER",
-        "PUBLIC_TITLE",
-    ]
-    if instrument_type in known_types:
+    if instrument_type in _KNOWN_INSTRUMENT_TYPES:
         return instrument_type
 
-    if op_type == "PUBLIC_TITLE":
-        return "PUBLIC_TITLE"
-    if op_type == "PRIVATE_TITLE":
-        return "PRIVATE_TITLE"
+    if op_type in _OPERATION_TYPE_FALLBACKS:
+        return op_type
 
     return "UNKNOWN"
 
@@ -82,7 +202,7 @@ def parse_option_details(gallo_name: str) -> dict:
     if not gallo_name:
         return {}
     cleaned_name = gallo_name.replace(".", "")
-    match = re.match(r"([A-Z0-9]+)\s*\((C|V)\)\s*([\d,\.]+)", cleaned_name)
+    match = _OPTION_NAME_RE.match(cleaned_name)
     if not match:
         return {}
     return {
@@ -90,3 +210,20 @@ def parse_option_details(gallo_name: str) -> dict:
         "option_type": "CALL" if match.group(2) == "C" else "PUT",
         "strike_price": float(match.group(3).replace(",", ".")),
     }
+
+
+def parse_option_details_series(gallo_names: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized parse_option_details over a Series of option names.
+    Names that do not match the option pattern yield an all-NaN row.
+    """
+    parts = gallo_names.fillna("").str.replace(".", "", regex=False)
+    parts = parts.str.extract(_OPTION_NAME_RE)
+    return pd.DataFrame(
+        {
+            "underlying_asset": parts[0],
+            "option_type": parts[1].map({"C": "CALL", "V": "PUT"}),
+            "strike_price": parts[2].str.replace(",", ".", regex=False).astype(float),
+        },
+        index=gallo_names.index,
+    )
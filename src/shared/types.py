@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 from datetime import datetime
 
 
@@ -13,3 +13,22 @@ class TransactionData(TypedDict):
     market_fees: float
     broker_fees: float
     taxes: float
+
+
+class ReconciledTransaction(TypedDict):
+    broker_id: str
+    date: datetime
+    op_type: str
+    ticker: str
+    asset_type: str
+    quantity: float
+    price: float
+    currency: str
+    total_net: float
+    market_fees: float
+    broker_fees: float
+    taxes: float
+    underlying_asset: NotRequired[str]
+    option_type: NotRequired[str]
+    strike_price: NotRequired[float]
+    expiration_date: NotRequired[datetime]